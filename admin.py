@@ -16,12 +16,14 @@ from google.appengine.ext.webapp import util
 
 import handlers.loaddb
 import handlers.admin
+import handlers.decided_filter
 
 def main():
     application = webapp.WSGIApplication([
       ('/admin', handlers.admin.AdminHandler),
       ('/admin/', handlers.admin.AdminHandler),
-      ('/admin/loaddb', handlers.loaddb.LoadDbHandler)
+      ('/admin/loaddb', handlers.loaddb.LoadDbHandler),
+      ('/admin/decided_filter', handlers.decided_filter.DecidedFilterHandler)
     ], debug=True)
     util.run_wsgi_app(application)
 
@@ -77,10 +77,38 @@ import os
 import sys
 import urlparse
 import cgi
+import hmac
+import hashlib
+import operator
+import binascii
 import httplib
 import string
 import urllib
 import re
+import socket
+import time
+import Queue
+
+try:
+  import threading
+except (ImportError):
+  # Built without thread support
+  import dummy_threading as threading
+
+def _threads_available():
+  """Whether a thread can be started here and runs alongside the caller."""
+  if threading.__name__ == 'dummy_threading':
+    return False
+  try:
+    probe = threading.Thread(target=lambda: None)
+    probe.start()
+    probe.join()
+    return True
+  except Exception:
+    # Some sandboxes import thread but refuse to start one
+    return False
+
+THREADS_AVAILABLE = _threads_available()
 
 import logging
 
@@ -91,12 +119,6 @@ try:
 except (ImportError):
   import oauth
 
-try:
-  # This is where simplejson lives on App Engine
-  from django.utils import simplejson
-except (ImportError):
-  import simplejson
-
 default_path = os.path.join(
   os.path.dirname(__file__), 'buzz_python_client.yaml'
 )
@@ -133,8 +155,83 @@ if CLIENT_CONFIG.has_key('debug') and CLIENT_CONFIG.get('debug'):
 else:
     DEBUG = False
 
+def _json_accelerated(json):
+  """Whether a json module decodes with a C scanner."""
+  scanner = getattr(json, 'scanner', None)
+  return getattr(scanner, 'c_make_scanner', None) is not None
+
+def _json_backends():
+  """
+  The json modules that can be imported, as (name, module) pairs, in the
+  order they were always tried in: App Engine's simplejson, then any
+  other simplejson, the bundled one last, then the standard library json.
+  """
+  backends = []
+  try:
+    # This is where simplejson lives on App Engine
+    from django.utils import simplejson
+    backends.append(('django.utils.simplejson', simplejson))
+  except (ImportError):
+    pass
+  try:
+    import simplejson
+    backends.append(('simplejson', simplejson))
+  except (ImportError):
+    pass
+  try:
+    import json
+    if hasattr(json, 'JSONDecoder'):
+      backends.append(('json', json))
+  except (ImportError):
+    pass
+  return backends
+
+def _select_json_backend(backends, name=None):
+  """
+  The backend named, or else the first one with a C scanner, or else the
+  first one.  The standard library json comes after simplejson, as its C
+  decoder is about three times slower than simplejson's speedups.
+  """
+  if name:
+    for backend in backends:
+      if backend[0] == name:
+        return backend
+    logging.warning('JSON backend %s is not available' % name)
+  for backend in backends:
+    if _json_accelerated(backend[1]):
+      return backend
+  return backends[0]
+
+JSON_BACKEND, simplejson = _select_json_backend(
+  _json_backends(), CLIENT_CONFIG.get('json_backend')
+)
+# Whether JSON_BACKEND decodes with C code or in pure Python
+JSON_ACCELERATED = _json_accelerated(simplejson)
+logging.info('buzz: JSON backend is %s (%s)' % (
+  JSON_BACKEND, JSON_ACCELERATED and 'C speedups' or 'pure Python'
+))
+
 DEFAULT_PAGE_SIZE = 20
 
+# Connections kept open per host by the shared ConnectionPool
+POOL_MAX_PER_HOST = 4
+# Seconds an idle pooled connection is kept before it is closed
+POOL_MAX_IDLE = 60
+# Methods safe to send again when a reused connection turns out closed
+POOL_RETRY_METHODS = ('GET', 'HEAD')
+
+# Pages a PrefetchingResultIterator fetches ahead of the consumer
+PREFETCH_DEPTH = 1
+
+# Whether a Result with fields also asks the server for a partial response
+PARTIAL_RESPONSE = bool(CLIENT_CONFIG.get('partial_response'))
+
+# Bytes read at a time from a response that is decoded as it arrives
+STREAM_CHUNK_SIZE = 16 * 1024
+
+# Person identities kept by the shared IdentityCache
+IDENTITY_CACHE_SIZE = 1000
+
 class RetrieveError(Exception):
   """
   This exception gets raised if there was some kind of HTTP or network error
@@ -180,6 +277,49 @@ class JSONParseError(Exception):
       else:
         return 'Parse failed: %s' % (self._json)
 
+# Marks a lazy field that has not been decoded from the json yet
+_UNDECODED = object()
+
+class _lazy(object):
+  """
+  A model field decoded from the object's json the first time it is read.
+
+  The decoder stores the value in the field's slot, and may also store the
+  fields decoded from the same part of the json.  Assigning to the field
+  replaces the decoded value.
+  """
+  def __init__(self, slot, decoder):
+    self.slot = slot
+    self.decoder = decoder
+
+  def __get__(self, obj, cls):
+    if obj is None:
+      return self
+    value = getattr(obj, self.slot)
+    if value is _UNDECODED:
+      try:
+        self.decoder(obj, obj._raw)
+      except KeyError, e:
+        raise JSONParseError(
+          json=obj._raw,
+          exception=e
+        )
+      value = getattr(obj, self.slot)
+    return value
+
+  def __set__(self, obj, value):
+    setattr(obj, self.slot, value)
+
+def _lazy_slots(fields):
+  return tuple(['_lazy_' + field for field in fields])
+
+def _release_json(obj, fields):
+  # Decode whatever has not been read yet, then let go of the json
+  for field in fields:
+    getattr(obj, field)
+  obj.json = None
+  obj._raw = None
+
 def _prune_json_envelope(json):
   # Follow Postel's law
   if isinstance(json, dict):
@@ -225,14 +365,625 @@ def _parse_geocode(geocode):
     raise ValueError('Bogus geocode.')
   return (lat, lon)
 
+# Keys of the response envelope that hold the list of results
+_RESULT_LIST_KEYS = ('items', 'entry', 'results')
+
+# Fields every projection of a result type keeps, as its constructor
+# needs them
+_REQUIRED_FIELDS = {
+  'Post': ('id', 'title'),
+  'Comment': ('id',)
+}
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"')
+# Skipping a container: a string, a run without strings or brackets, an
+# opening bracket or a closing bracket
+_SKIP_TOKEN = re.compile(
+  r'("[^"\\]*(?:\\.[^"\\]*)*")|([^"\[\]{}]+)|([\[{])|([\]}])'
+)
+_SCALAR = re.compile(r'[^,:\]}\s]+')
+
+# The scanner of the simplejson decoder, missing from some old versions
+_scan_once = getattr(simplejson.JSONDecoder(), 'scan_once', None)
+
+def _decode_value(s, idx):
+  """Decodes the value at idx whole, returns it and where it ends."""
+  if _scan_once:
+    try:
+      return _scan_once(s, idx)
+    except StopIteration:
+      raise ValueError('Expecting value at %d' % idx)
+  end = _skip_value(s, idx)
+  return simplejson.loads(s[idx:end]), end
+
+def _skip_value(s, idx):
+  """Returns where the value at idx ends, without decoding it."""
+  c = s[idx:idx + 1]
+  if c == '"':
+    m = _STRING.match(s, idx)
+  elif c == '{' or c == '[':
+    depth = 0
+    match = _SKIP_TOKEN.match
+    while True:
+      m = match(s, idx)
+      if m is None:
+        raise ValueError('Unterminated value at %d' % idx)
+      idx = m.end()
+      group = m.lastindex
+      if group == 3:
+        depth += 1
+      elif group == 4:
+        depth -= 1
+        if depth == 0:
+          return idx
+  else:
+    m = _SCALAR.match(s, idx)
+  if m is None:
+    raise ValueError('Expecting value at %d' % idx)
+  return m.end()
+
+def _projection_tree(fields):
+  """Turns dotted fields into a tree, C{True} marks a field kept whole."""
+  tree = {}
+  for field in fields:
+    node = tree
+    parts = field.split('.')
+    for part in parts[:-1]:
+      child = node.get(part)
+      if child is True:
+        break
+      if child is None:
+        child = node[part] = {}
+      node = child
+    else:
+      node[parts[-1]] = True
+  return tree
+
+def _partial_response_selector(tree):
+  """The partial response selector for the fields of a projection tree."""
+  selector = []
+  for key, child in sorted(tree.items()):
+    if child is True:
+      selector.append(key)
+    else:
+      selector.append('%s(%s)' % (key, _partial_response_selector(child)))
+  return ','.join(selector)
+
+class ProjectedDecoder:
+  """
+  Decodes a response keeping only the projected fields of each result.
+
+  The envelope around the results is decoded whole.  Within each result,
+  fields outside the projection are skipped over with a few regular
+  expression matches instead of being decoded, so neither the CPU nor the
+  memory for their values is spent.  Kept fields are decoded by
+  simplejson, so their values are the same as with C{simplejson.loads}.
+
+  Skipping fields in Python only beats decoding them when decoding is in
+  Python too.  When simplejson decodes in C (L{JSON_ACCELERATED}) the
+  response is decoded whole, as without a projection.
+  """
+  def __init__(self, fields):
+    self.fields = tuple(fields)
+    self.tree = _projection_tree(self.fields)
+    # The fields query parameter asking the server for the projected
+    # results and the paging fields of the envelope
+    self.selector = 'kind,links,startIndex,totalResults,items(%s)' % \
+      _partial_response_selector(self.tree)
+
+  def decode(self, s):
+    if JSON_ACCELERATED:
+      return simplejson.loads(s)
+    idx = _WHITESPACE.match(s, 0).end()
+    value, idx = self._envelope(s, idx)
+    if _WHITESPACE.match(s, idx).end() != len(s):
+      raise ValueError('Extra data at %d' % idx)
+    return value
+
+  def _elements(self, s, idx, decode):
+    """Decodes the array at idx element by element."""
+    ws = _WHITESPACE.match
+    values = []
+    idx = ws(s, idx + 1).end()
+    if s[idx:idx + 1] == ']':
+      return values, idx + 1
+    while True:
+      value, idx = decode(s, idx)
+      values.append(value)
+      idx = ws(s, idx).end()
+      c = s[idx:idx + 1]
+      if c == ']':
+        return values, idx + 1
+      if c != ',':
+        raise ValueError('Expecting , delimiter at %d' % idx)
+      idx = ws(s, idx + 1).end()
+
+  def _object(self, s, idx, decode_member):
+    """
+    Decodes the object at idx, C{decode_member(key, s, idx)} returns each
+    member's value, or _SKIPPED, and where it ends.
+    """
+    ws = _WHITESPACE.match
+    value = {}
+    idx = ws(s, idx + 1).end()
+    if s[idx:idx + 1] == '}':
+      return value, idx + 1
+    while True:
+      m = _STRING.match(s, idx)
+      if m is None:
+        raise ValueError('Expecting property name at %d' % idx)
+      key = s[idx + 1:m.end() - 1]
+      if '\\' in key:
+        key = simplejson.loads(m.group())
+      idx = ws(s, m.end()).end()
+      if s[idx:idx + 1] != ':':
+        raise ValueError('Expecting : delimiter at %d' % idx)
+      member, idx = decode_member(key, s, ws(s, idx + 1).end())
+      if member is not _SKIPPED:
+        value[key] = member
+      idx = ws(s, idx).end()
+      c = s[idx:idx + 1]
+      if c == '}':
+        return value, idx + 1
+      if c != ',':
+        raise ValueError('Expecting , delimiter at %d' % idx)
+      idx = ws(s, idx + 1).end()
+
+  def _envelope(self, s, idx):
+    if s[idx:idx + 1] != '{':
+      return _decode_value(s, idx)
+    def decode_member(key, s, idx):
+      if key == 'data':
+        return self._envelope(s, idx)
+      if key in _RESULT_LIST_KEYS and s[idx:idx + 1] == '[':
+        return self._elements(s, idx, self._result)
+      return _decode_value(s, idx)
+    return self._object(s, idx, decode_member)
+
+  def _result(self, s, idx):
+    if JSON_ACCELERATED:
+      return _decode_value(s, idx)
+    return self._project(s, idx, self.tree)
+
+  def _project(self, s, idx, tree):
+    c = s[idx:idx + 1]
+    if tree is True or c not in ('{', '['):
+      return _decode_value(s, idx)
+    if c == '[':
+      return self._elements(s, idx, lambda s, idx: self._project(s, idx, tree))
+    def decode_member(key, s, idx):
+      child = tree.get(key)
+      if child is None:
+        return _SKIPPED, _skip_value(s, idx)
+      return self._project(s, idx, child)
+    return self._object(s, idx, decode_member)
+
+# Marks a skipped member in ProjectedDecoder
+_SKIPPED = object()
+
+# ProjectedDecoders by result type name and fields
+_projected_decoders = {}
+
+def _projected_decoder(result_type, fields):
+  name = getattr(result_type, '__name__', None)
+  key = (name, tuple(fields))
+  decoder = _projected_decoders.get(key)
+  if decoder is None:
+    decoder = ProjectedDecoder(tuple(fields) + _REQUIRED_FIELDS.get(name, ()))
+    _projected_decoders[key] = decoder
+  return decoder
+
+# What may follow a complete value: whitespace or a delimiter
+_VALUE_ENDS = frozenset(' \t\n\r,:]}')
+
+class StreamingDecoder:
+  """
+  Decodes a response as it is read, handing out its results one at a time.
+
+  The body is read through C{read(size)} in chunks of C{chunk_size} bytes,
+  and the part that has been decoded is dropped as more is read, so the
+  whole body is never held.  Each result is decoded by
+  C{decode_result(s, idx)}, which returns it and where it ends, like the
+  methods of L{ProjectedDecoder}.  The rest of the envelope is decoded
+  whole and is in C{envelope}, with an empty list in place of the results,
+  once the results have all been handed out.
+  """
+  def __init__(self, read, decode_result=None, chunk_size=STREAM_CHUNK_SIZE):
+    self.read = read
+    self.decode_result = decode_result or _decode_value
+    self.chunk_size = chunk_size
+    self.envelope = None
+    # The most bytes of the body held at once
+    self.peak_buffered = 0
+    self._buffer = ''
+    self._idx = 0
+    self._eof = False
+
+  def __iter__(self):
+    c = self._skip_whitespace()
+    if c == '':
+      # An empty body
+      return
+    if c != '{':
+      self.envelope = self._decode(_decode_value)
+    else:
+      self.envelope = {}
+      for value in self._envelope(self.envelope):
+        yield value
+    if self._skip_whitespace() != '':
+      raise ValueError('Extra data at %d' % self._idx)
+
+  def _fill(self, size):
+    """Reads more of the body, returns False at the end of it."""
+    if self._eof:
+      return False
+    if self._idx:
+      self._buffer = self._buffer[self._idx:]
+      self._idx = 0
+    chunk = self.read(max(size, self.chunk_size))
+    if not chunk:
+      self._eof = True
+      return False
+    self._buffer += chunk
+    self.peak_buffered = max(self.peak_buffered, len(self._buffer))
+    return True
+
+  def _skip_whitespace(self):
+    """Moves past whitespace, returns the next character or ''."""
+    while True:
+      self._idx = _WHITESPACE.match(self._buffer, self._idx).end()
+      if self._idx < len(self._buffer) or not self._fill(0):
+        return self._buffer[self._idx:self._idx + 1]
+
+  def _decode(self, decode):
+    """
+    Decodes the value at the current position with C{decode(s, idx)},
+    reading more of the body until the value is complete.
+    """
+    while True:
+      try:
+        value, end = decode(self._buffer, self._idx)
+        # A number cut short by the end of what has been read can still
+        # decode, so a value only counts once what follows it has arrived
+        if self._buffer[end:end + 1] in _VALUE_ENDS or self._eof:
+          self._idx = end
+          return value
+      except (ValueError, IndexError):
+        if self._eof:
+          raise
+      # Read at least as much again as the value so far, so a large value
+      # is not decoded over and over
+      self._fill(len(self._buffer) - self._idx)
+
+  def _delimiter(self, close):
+    """Moves past a , or the closing bracket, returns True on the latter."""
+    c = self._skip_whitespace()
+    self._idx += 1
+    if c == close:
+      return True
+    if c != ',':
+      raise ValueError('Expecting , delimiter at %d' % (self._idx - 1))
+    self._skip_whitespace()
+    return False
+
+  def _envelope(self, value):
+    self._idx += 1
+    if self._skip_whitespace() == '}':
+      self._idx += 1
+      return
+    while True:
+      key = self._decode(_decode_value)
+      if not isinstance(key, basestring):
+        raise ValueError('Expecting property name at %d' % self._idx)
+      if self._skip_whitespace() != ':':
+        raise ValueError('Expecting : delimiter at %d' % self._idx)
+      self._idx += 1
+      c = self._skip_whitespace()
+      if key == 'data' and c == '{':
+        value[key] = {}
+        for result in self._envelope(value[key]):
+          yield result
+      elif key in _RESULT_LIST_KEYS and c == '[':
+        value[key] = []
+        for result in self._results():
+          yield result
+      else:
+        value[key] = self._decode(_decode_value)
+      if self._delimiter('}'):
+        return
+
+  def _results(self):
+    self._idx += 1
+    if self._skip_whitespace() == ']':
+      self._idx += 1
+      return
+    while True:
+      yield self._decode(self.decode_result)
+      if self._delimiter(']'):
+        return
+
+class BufferedResponse:
+  """
+  An HTTP response whose body has already been read, so the connection it
+  came in on can go back to the pool straight away.
+  """
+  def __init__(self, response):
+    self.status = response.status
+    self.reason = response.reason
+    self.msg = response.msg
+    self._response = response
+    self._body = response.read()
+
+  def read(self, amt=None):
+    if amt is None:
+      body, self._body = self._body, ''
+    else:
+      body, self._body = self._body[:amt], self._body[amt:]
+    return body
+
+  def getheader(self, name, default=None):
+    return self._response.getheader(name, default)
+
+  def getheaders(self):
+    return self._response.getheaders()
+
+class StreamingResponse:
+  """
+  An HTTP response whose body is read from the connection as it is
+  consumed.  The connection goes back to the pool once the body has been
+  read to the end, and is closed if the response is closed before then.
+  """
+  def __init__(self, response, connection, pool):
+    self.status = response.status
+    self.reason = response.reason
+    self.msg = response.msg
+    self._response = response
+    self._connection = connection
+    self._pool = pool
+
+  def read(self, amt=None):
+    if self._connection is None:
+      return ''
+    try:
+      body = self._response.read(amt)
+    except:
+      self.close()
+      raise
+    if amt is None or not body or self._response.isclosed():
+      self._release()
+    return body
+
+  def _release(self):
+    connection, self._connection = self._connection, None
+    if (self.getheader('connection') or '').lower() == 'close':
+      self._pool.discard(connection)
+    else:
+      self._pool.checkin(connection)
+
+  def close(self):
+    """Gives up on the rest of the body, closing the connection."""
+    connection, self._connection = self._connection, None
+    if connection is not None:
+      self._pool.discard(connection)
+
+  def getheader(self, name, default=None):
+    return self._response.getheader(name, default)
+
+  def getheaders(self):
+    return self._response.getheaders()
+
+class ConnectionPool:
+  """
+  A pool of keep-alive HTTP connections, kept per scheme, host and port.
+
+  Connections are checked out for one request and checked back in once the
+  response has been read.  Up to C{max_per_host} connections per host are
+  kept; connections handed out beyond that are closed when they come back
+  rather than blocking the caller.  Idle connections older than
+  C{max_idle} seconds are closed instead of reused.  The pool is safe to
+  share between threads.
+  """
+  def __init__(self, max_per_host=POOL_MAX_PER_HOST, max_idle=POOL_MAX_IDLE):
+    self.max_per_host = max_per_host
+    self.max_idle = max_idle
+    # (scheme, host, port) -> [(connection, last used)], most recent last
+    self._idle = {}
+    # (scheme, host, port) -> number of connections checked out
+    self._checked_out = {}
+    self._lock = threading.Lock()
+    self.hits = 0
+    self.misses = 0
+    self.reconnects = 0
+    self.expired = 0
+
+  def _new_connection(self, key):
+    scheme, host, port = key
+    if scheme == 'https':
+      return httplib.HTTPSConnection(host, port)
+    return httplib.HTTPConnection(host, port)
+
+  def checkout(self, scheme, host, port):
+    """
+    Returns a connection to the host, reusing an idle one if possible.  The
+    connection's C{_pool_reused} tells whether it was reused.
+    """
+    key = (scheme, host, port)
+    now = time.time()
+    stale = []
+    connection = None
+    self._lock.acquire()
+    try:
+      idle = self._idle.get(key, [])
+      while idle:
+        candidate, last_used = idle.pop()
+        if now - last_used > self.max_idle:
+          stale.append(candidate)
+        else:
+          connection = candidate
+          break
+      self.expired += len(stale)
+      if connection:
+        self.hits += 1
+      else:
+        self.misses += 1
+      self._checked_out[key] = self._checked_out.get(key, 0) + 1
+    finally:
+      self._lock.release()
+    for candidate in stale:
+      candidate.close()
+    reused = connection is not None
+    if not reused:
+      connection = self._new_connection(key)
+    connection._pool_key = key
+    connection._pool_reused = reused
+    return connection
+
+  def checkin(self, connection):
+    """Returns a connection whose last response has been fully read."""
+    key = connection._pool_key
+    self._lock.acquire()
+    try:
+      self._checked_out[key] -= 1
+      idle = self._idle.setdefault(key, [])
+      keep = len(idle) + self._checked_out[key] < self.max_per_host
+      if keep:
+        idle.append((connection, time.time()))
+    finally:
+      self._lock.release()
+    if not keep:
+      connection.close()
+
+  def discard(self, connection):
+    """Closes a checked out connection that is no longer usable."""
+    self._lock.acquire()
+    try:
+      self._checked_out[connection._pool_key] -= 1
+    finally:
+      self._lock.release()
+    connection.close()
+
+  def reconnect(self, connection):
+    """Replaces a broken checked out connection with a new one."""
+    key = connection._pool_key
+    connection.close()
+    self._lock.acquire()
+    try:
+      self.reconnects += 1
+    finally:
+      self._lock.release()
+    connection = self._new_connection(key)
+    connection._pool_key = key
+    connection._pool_reused = False
+    return connection
+
+  def stats(self):
+    self._lock.acquire()
+    try:
+      return {
+        'hits': self.hits,
+        'misses': self.misses,
+        'reconnects': self.reconnects,
+        'expired': self.expired,
+        'idle': sum([len(idle) for idle in self._idle.values()]),
+        'checked_out': sum(self._checked_out.values())
+      }
+    finally:
+      self._lock.release()
+
+class OAuthSigner:
+  """
+  Signs API requests with HMAC-SHA1 for one consumer and access token.
+
+  Everything that does not change between requests is prepared once: the
+  escaped consumer key, token and version parameters, and an C{hmac} object
+  keyed with the escaped secrets, which is copied for each signature.  The
+  signatures are the same as those of C{oauth.OAuthRequest.sign_request}
+  with C{oauth.OAuthSignatureMethod_HMAC_SHA1}.
+  """
+  def __init__(self, consumer, token):
+    self.identity = _oauth_identity(consumer, token)
+    key = '%s&%s' % (oauth.escape(consumer.secret), oauth.escape(token.secret))
+    self._hmac = hmac.new(key, digestmod=hashlib.sha1)
+    # Query parameters may replace these
+    self._defaults = {
+      'oauth_consumer_key': oauth.escape(oauth._utf8_str(consumer.key)),
+      'oauth_version': oauth.escape(oauth.OAuthRequest.version)
+    }
+    # These replace query parameters
+    self._overrides = {
+      'oauth_token': oauth.escape(oauth._utf8_str(token.key)),
+      'oauth_signature_method': 'HMAC-SHA1'
+    }
+    if token.callback:
+      self._overrides['oauth_callback'] = \
+        oauth.escape(oauth._utf8_str(token.callback))
+
+  def sign(self, http_method, http_uri, timestamp=None, nonce=None):
+    """Returns the Authorization header for the request."""
+    if timestamp is None:
+      timestamp = oauth.generate_timestamp()
+    if nonce is None:
+      nonce = oauth.generate_nonce()
+    escape = oauth.escape
+    parameters = self._defaults.copy()
+    parameters['oauth_timestamp'] = str(timestamp)
+    parameters['oauth_nonce'] = escape(nonce)
+
+    scheme, netloc, path, params, query, fragment = urlparse.urlparse(http_uri)
+    if query:
+      seen = {}
+      for k, v in _parse_qsl(query, keep_blank_values=True):
+        # The first value of a repeated parameter is the one signed
+        if k not in seen:
+          seen[k] = True
+          parameters[escape(k)] = escape(v)
+    parameters.update(self._overrides)
+
+    if scheme == 'http' and netloc[-3:] == ':80':
+      netloc = netloc[:-3]
+    elif scheme == 'https' and netloc[-4:] == ':443':
+      netloc = netloc[:-4]
+    items = parameters.items()
+    items.sort()
+    base = '&'.join([
+      escape(http_method.upper()),
+      escape('%s://%s%s' % (scheme, netloc, path)),
+      escape('&'.join(['%s=%s' % item for item in items]))
+    ])
+    hashed = self._hmac.copy()
+    hashed.update(base)
+    signature = binascii.b2a_base64(hashed.digest())[:-1]
+
+    header = ['OAuth realm=""']
+    for k, v in items:
+      if k[:6] == 'oauth_':
+        header.append('%s="%s"' % (k, v))
+    header.append('oauth_signature="%s"' % escape(signature))
+    return {'Authorization': ', '.join(header)}
+
+def _oauth_identity(consumer, token):
+  return (consumer.key, consumer.secret, token.key, token.secret,
+          token.callback)
+
+if hasattr(urlparse, 'parse_qsl'):
+  _parse_qsl = urlparse.parse_qsl
+else:
+  # Deprecated in 2.6
+  _parse_qsl = cgi.parse_qsl
+
+# The pool shared by every Client that is not given its own
+connection_pool = ConnectionPool()
+
 class Client:
   """
   The L{Client} object is the primary method of making calls against the Buzz
   API.  It can be used with or without authentication.  It attempts to reuse
-  HTTP connections whenever possible.  Currently, authentication is done via
+  HTTP connections whenever possible, through a L{ConnectionPool} shared by
+  all clients unless one is passed in.  Currently, authentication is done via
   OAuth.  
   """
-  def __init__(self):
+  def __init__(self, pool=None):
     # Make sure we're always getting the right HTTP connection, even if
     # API_PREFIX changes
     parsed = urlparse.urlparse(API_PREFIX)
@@ -250,11 +1001,10 @@ class Client:
       else:
         self._port = 80
 
-    self._http_connection = None
+    self.pool = pool or connection_pool
 
     # OAuth state
     self.oauth_scopes = []
-    self._oauth_http_connection = None
     self.oauth_consumer = None
     self.oauth_request_token = None
     self.oauth_access_token = None
@@ -262,19 +1012,63 @@ class Client:
     self._oauth_token_authorized = False
     self._oauth_signature_method_hmac_sha1 = \
       oauth.OAuthSignatureMethod_HMAC_SHA1()
+    self._oauth_signer = None
 
-  @property
-  def http_connection(self):
-    # if not self._http_connection:
-    #   self._http_connection = httplib.HTTPSConnection('www.google.com')
-    if not self._http_connection:
-      if self._port == 443:
-        self._http_connection = httplib.HTTPSConnection(self._host)
-      elif self._port == 80:
-        self._http_connection = httplib.HTTPConnection(self._host)
-      else:
-        self._http_connection = httplib.HTTPConnection(self._host, self._port)
-    return self._http_connection
+  def _pool_address(self, http_uri):
+    """The (scheme, host, port) of the pool a request for the URI uses."""
+    parsed = urlparse.urlparse(http_uri)
+    scheme = parsed[0] or 'https'
+    authority = parsed[1].split(':')
+    if not authority[0]:
+      # Relative URI, goes to the API host
+      return (scheme, self._host, int(self._port))
+    if len(authority) == 2 and authority[1]:
+      port = int(authority[1])
+    elif scheme == 'https':
+      port = 443
+    else:
+      port = 80
+    return (scheme, authority[0], port)
+
+  def _pooled_request(self, http_method, http_uri, http_headers, http_body,
+                      stream=False):
+    """
+    Sends a request on a pooled connection and returns the response with its
+    body read, or with C{stream} a L{StreamingResponse} that holds on to the
+    connection until its body has been read.  A GET or HEAD on a reused
+    connection the server has closed in the meantime is retried once on a
+    new connection; other failures are raised, so a POST that may have
+    reached the server is never sent twice.
+    """
+    scheme, host, port = self._pool_address(http_uri)
+    connection = self.pool.checkout(scheme, host, port)
+    try:
+      try:
+        connection.request(
+          http_method, http_uri, headers=http_headers, body=http_body
+        )
+        response = connection.getresponse()
+      except (httplib.BadStatusLine, httplib.CannotSendRequest, socket.error):
+        if not connection._pool_reused or \
+            http_method not in POOL_RETRY_METHODS:
+          raise
+        # Reset the connection and retry once
+        connection = self.pool.reconnect(connection)
+        connection.request(
+          http_method, http_uri, headers=http_headers, body=http_body
+        )
+        response = connection.getresponse()
+      if stream:
+        return StreamingResponse(response, connection, self.pool)
+      response = BufferedResponse(response)
+    except:
+      self.pool.discard(connection)
+      raise
+    if (response.getheader('connection') or '').lower() == 'close':
+      self.pool.discard(connection)
+    else:
+      self.pool.checkin(connection)
+    return response
 
   def use_anonymous_oauth_consumer(self, oauth_display_name=None):
     """
@@ -318,47 +1112,19 @@ class Client:
   def build_oauth_access_token(self, key, secret):
     self.oauth_access_token = oauth.OAuthToken(key, secret)
 
-  @property
-  def oauth_http_connection(self):
-    if not self._oauth_http_connection:
-      self._oauth_http_connection = httplib.HTTPSConnection('www.google.com')
-    if self._oauth_http_connection.host != 'www.google.com':
-      raise ValueError("OAuth HTTPS Connection must be for 'www.google.com'.")
-    # if self._oauth_http_connection.port != 443:
-    #   raise ValueError("OAuth HTTPS Connection must be for port 443.")
-    return self._oauth_http_connection
-
   def fetch_oauth_response(self, oauth_request):
     """Sends a signed request to Google's Accounts API."""
     # Transmit the OAuth request to Google
     if oauth_request.http_method != 'POST':
       raise ValueError("OAuthRequest HTTP method must be POST.")
-    try:
-      self.oauth_http_connection.request(
-        oauth_request.http_method,
-        oauth_request.http_url,
-        body=oauth_request.to_postdata(),
-        headers={
-          'Content-Type': 'application/x-www-form-urlencoded'
-        }
-      )
-      response = self.oauth_http_connection.getresponse()
-    except (httplib.BadStatusLine, httplib.CannotSendRequest):
-      # Reset the connection
-      if self._oauth_http_connection:
-        self._oauth_http_connection.close()
-      self._oauth_http_connection = None
-      # Retry once
-      self.oauth_http_connection.request(
-        oauth_request.http_method,
-        oauth_request.http_url,
-        body=oauth_request.to_postdata(),
-        headers={
-          'Content-Type': 'application/x-www-form-urlencoded'
-        }
-      )
-      response = self.oauth_http_connection.getresponse()
-    return response
+    if urlparse.urlparse(oauth_request.http_url)[1] != 'www.google.com':
+      raise ValueError("OAuth requests must be for 'www.google.com'.")
+    return self._pooled_request(
+      oauth_request.http_method,
+      oauth_request.http_url,
+      {'Content-Type': 'application/x-www-form-urlencoded'},
+      oauth_request.to_postdata()
+    )
 
   def fetch_oauth_request_token(self, callback_uri):
     """Obtains an OAuth request token from Google's Accounts API."""
@@ -478,10 +1244,23 @@ class Client:
     )
     return oauth_request
 
-  def fetch_api_response(self, http_method, http_uri, http_headers={}, \
-                               http_connection=None, http_body=''):
-    if not http_connection:
-      http_connection = self.http_connection
+  @property
+  def oauth_signer(self):
+    """
+    The L{OAuthSigner} for the current consumer and access token, rebuilt
+    when either of them changes.
+    """
+    identity = _oauth_identity(self.oauth_consumer, self.oauth_access_token)
+    if not self._oauth_signer or self._oauth_signer.identity != identity:
+      self._oauth_signer = \
+        OAuthSigner(self.oauth_consumer, self.oauth_access_token)
+    return self._oauth_signer
+
+  def fetch_api_response(self, http_method, http_uri, http_headers=None, \
+                               http_body='', stream=False):
+    # Signed per request, so never written into a caller's dict that another
+    # request may be using
+    http_headers = dict(http_headers or {})
     if not self.oauth_consumer and http_headers.get('Authorization'):
       del http_headers['Authorization']
     http_headers.update({
@@ -492,31 +1271,12 @@ class Client:
         'Content-Type': 'application/json'
       })
     if self.oauth_consumer and self.oauth_access_token:
-      # Build OAuth request and add OAuth header if we've got an access token
-      oauth_request = self.build_oauth_request(http_method, http_uri)
-      http_headers.update(oauth_request.to_header())
+      # Add the OAuth header if we've got an access token
+      http_headers.update(self.oauth_signer.sign(http_method, http_uri))
     try:
-      try:
-        http_connection.request(
-          http_method, http_uri,
-          headers=http_headers,
-          body=http_body
-        )
-        response = http_connection.getresponse()
-      except (httplib.BadStatusLine, httplib.CannotSendRequest):
-        if http_connection and http_connection == self.http_connection:
-          # Reset the connection
-          http_connection.close()
-          http_connection = None
-          self._http_connection = None
-          http_connection = self.http_connection
-          # Retry once
-          http_connection.request(
-            http_method, http_uri,
-            headers=http_headers,
-            body=http_body
-          )
-          response = http_connection.getresponse()
+      response = self._pooled_request(
+        http_method, http_uri, http_headers, http_body, stream=stream
+      )
     except Exception, e:
       if e.__class__.__name__ == 'ApplicationError' or \
           e.__class__.__name__ == 'DownloadError':
@@ -626,14 +1386,15 @@ class Client:
       api_endpoint += "&radius=" + urllib.quote(str(radius))
     return Result(self, 'GET', api_endpoint, result_type=Post)
 
-  def posts(self, type_id='@self', user_id='@me', max_results=20):
+  def posts(self, type_id='@self', user_id='@me', max_results=20,
+      fields=None):
     if isinstance(user_id, Person):
       user_id = user_id.id
     api_endpoint = API_PREFIX + "/activities/" + str(user_id) + "/" + type_id
     api_endpoint += "?alt=json"
     if max_results:
       api_endpoint += "&max-results=" + str(max_results)
-    return Result(self, 'GET', api_endpoint, result_type=Post)
+    return Result(self, 'GET', api_endpoint, result_type=Post, fields=fields)
 
   def post(self, post_id, actor_id='0'):
     if isinstance(actor_id, Person):
@@ -670,7 +1431,7 @@ class Client:
     api_endpoint += "?alt=json"
     return Result(self, 'DELETE', api_endpoint, result_type=None).data
 
-  def comments(self, post_id, actor_id='0', max_results=20):
+  def comments(self, post_id, actor_id='0', max_results=20, fields=None):
     if isinstance(actor_id, Person):
       actor_id = actor_id.id
     if isinstance(post_id, Post):
@@ -680,7 +1441,9 @@ class Client:
     api_endpoint += "?alt=json"
     if max_results:
       api_endpoint += "&max-results=" + str(max_results)
-    return Result(self, 'GET', api_endpoint, result_type=Comment)
+    return Result(
+      self, 'GET', api_endpoint, result_type=Comment, fields=fields
+    )
 
   def create_comment(self, comment):
     api_endpoint = API_PREFIX + ("/activities/%s/@self/%s/@comments" % (
@@ -838,44 +1601,37 @@ class Client:
     api_endpoint = "https://www.google.com/accounts/AuthSubTokenInfo"
     if not self.oauth_access_token:
       raise ValueError("Client is missing access token.")
-    response = self.fetch_api_response(
-      'GET',
-      api_endpoint,
-      http_connection=self.oauth_http_connection
-    )
+    response = self.fetch_api_response('GET', api_endpoint)
     return response.read()
 
-class Post:
+class Post(object):
+  """
+  A Buzz post.  Only the id is decoded up front, every other field is
+  decoded from the json when it is first read.  L{release_json} decodes
+  the rest and drops the json.
+  """
+  _lazy_fields = (
+    'content', 'annotation', 'title', 'object', 'links', 'link', 'uri',
+    'replies', 'liked', 'comment_count', 'liker_count', 'verb', 'published',
+    'updated', 'type', 'actor', 'attachments', 'geocode', 'place_name',
+    'visibility', 'placeholder'
+  )
+  __slots__ = (
+    'client', 'json', '_raw', 'id', 'place_id', '_likers', '_comments'
+  ) + _lazy_slots(_lazy_fields)
+
   def __init__(self, json=None, client=None,
       content=None, annotation=None, uri=None, verb=None, actor=None,
       geocode=None, place_id=None,
       attachments=None):
     self.client = client
     self.json = json
+    self._raw = None
     self.id = None
-    self.object = None
-    self.type=None
-    self.place_name=None
-    self.visibility=None
-    self.published=None
-    self.updated=None
-    self.placeholder=None
-    
-    # Construct the post piece-wise.
-    self.content = content
-    self.annotation = annotation
-    self.uri = uri
-    self.verb = verb
-    self.actor = actor
-    self.geocode = geocode
     self.place_id = place_id
-    self.attachments = attachments
-    
     self._likers = None
-    self.liker_count = 0
     self._comments = None
-    self.comment_count = 0
-    
+
     if self.json:
       # Parse the incoming JSON
       # Follow Postel's law
@@ -884,85 +1640,169 @@ class Post:
         if json.get('error'):
           raise JSONParseError(json=json)
         self.id = json['id']
-        if isinstance(json.get('content'), dict):
-          self.content = json['content']['value']
-        elif json.get('content'):
-          self.content = json['content']
-        elif json.get('object') and json['object'].get('content'):
-          self.content = json['object']['content']
-        if isinstance(json.get('annotations'), list):
-          self.annotation = json['annotations'][0]['content']
-        elif json.get('annotation'):
-          self.annotation = json['annotation']
-        if isinstance(json['title'], dict):
-          self.title = json['title']['value']
-        else:
-          self.title = json['title']
-        if json.get('object'):
-          self.object = json['object']
-        if json.get('links'):
-          self.links = _parse_links(json.get('links'))
-        self.replies = []
-        self.liked = []
-        if self.links:
-          for link in self.links:
-            if link.rel == "alternate":
-              self.link = link
-              self.uri = self.link.uri
-            elif link.rel == "replies":
-              self.replies.append(link)
-            elif link.rel == "liked":
-              self.liked.append(link)
-        if self.replies:
-          for reply in self.replies:
-            if reply.count:
-              self.comment_count += reply.count
-        if self.liked:
-          for liker in self.liked:
-            if liker.count:
-              self.liker_count += liker.count
-        if isinstance(json.get('verb'), list):
-          self.verb = json['verb'][0]
-        elif json.get('verb'):
-          self.verb = json['verb']
-        if json.get('published'):
-          self.published = json['published']
-        if json.get('updated'):
-          self.updated = json['updated']
-        if isinstance(json.get('type'), list):
-          self.type = json['type'][0]
-        elif json.get('type'):
-          self.type = json['type']
-        elif self.object and self.object.get('type'):
-          self.type = self.object['type']
-        if json.get('author'):
-          self.actor = Person(json['author'], client=self.client)
-        elif json.get('actor'):
-          self.actor = Person(json['actor'], client=self.client)
-        if self.object and self.object.get('attachments'):
-          self.attachments = [
-            Attachment(attachment_json, client=self.client)
-            for attachment_json
-            in self.object['attachments']
-          ]
-        else:
-          self.attachments = []
-        if json.get('geocode'):
-          self.geocode = _parse_geocode(json['geocode'])
-        if json.get('placeName'):
-          self.place_name = json['placeName']
-        if json.get('visibility'):
-          self.visibility = json['visibility']
-          if isinstance(self.visibility, dict) and \
-              self.visibility.get('entries'):
-            self.visibility = self.visibility.get('entries')
-        if json.get('placeholder'):
-          self.placeholder = json['placeholder']
+        json['title']
       except KeyError, e:
         raise JSONParseError(
           json=json,
           exception=e
         )
+      self._raw = json
+      for slot in _lazy_slots(self._lazy_fields):
+        setattr(self, slot, _UNDECODED)
+    else:
+      # Construct the post piece-wise.
+      self._lazy_content = content
+      self._lazy_annotation = annotation
+      self._lazy_title = None
+      self._lazy_object = None
+      self._lazy_links = []
+      self._lazy_link = None
+      self._lazy_uri = uri
+      self._lazy_replies = []
+      self._lazy_liked = []
+      self._lazy_comment_count = 0
+      self._lazy_liker_count = 0
+      self._lazy_verb = verb
+      self._lazy_published = None
+      self._lazy_updated = None
+      self._lazy_type = None
+      self._lazy_actor = actor
+      self._lazy_attachments = attachments
+      self._lazy_geocode = geocode
+      self._lazy_place_name = None
+      self._lazy_visibility = None
+      self._lazy_placeholder = None
+
+  def _decode_content(self, json):
+    if isinstance(json.get('content'), dict):
+      self._lazy_content = json['content']['value']
+    elif json.get('content'):
+      self._lazy_content = json['content']
+    elif json.get('object') and json['object'].get('content'):
+      self._lazy_content = json['object']['content']
+    else:
+      self._lazy_content = None
+  content = _lazy('_lazy_content', _decode_content)
+
+  def _decode_annotation(self, json):
+    if isinstance(json.get('annotations'), list):
+      self._lazy_annotation = json['annotations'][0]['content']
+    else:
+      self._lazy_annotation = json.get('annotation') or None
+  annotation = _lazy('_lazy_annotation', _decode_annotation)
+
+  def _decode_title(self, json):
+    if isinstance(json['title'], dict):
+      self._lazy_title = json['title']['value']
+    else:
+      self._lazy_title = json['title']
+  title = _lazy('_lazy_title', _decode_title)
+
+  def _decode_object(self, json):
+    self._lazy_object = json.get('object') or None
+  object = _lazy('_lazy_object', _decode_object)
+
+  def _decode_links(self, json):
+    self._lazy_links = []
+    self._lazy_link = None
+    self._lazy_uri = None
+    self._lazy_replies = []
+    self._lazy_liked = []
+    self._lazy_comment_count = 0
+    self._lazy_liker_count = 0
+    if json.get('links'):
+      self._lazy_links = _parse_links(json.get('links'))
+    for link in self._lazy_links:
+      if link.rel == "alternate":
+        self._lazy_link = link
+        self._lazy_uri = link.uri
+      elif link.rel == "replies":
+        self._lazy_replies.append(link)
+        if link.count:
+          self._lazy_comment_count += link.count
+      elif link.rel == "liked":
+        self._lazy_liked.append(link)
+        if link.count:
+          self._lazy_liker_count += link.count
+  links = _lazy('_lazy_links', _decode_links)
+  link = _lazy('_lazy_link', _decode_links)
+  uri = _lazy('_lazy_uri', _decode_links)
+  replies = _lazy('_lazy_replies', _decode_links)
+  liked = _lazy('_lazy_liked', _decode_links)
+  comment_count = _lazy('_lazy_comment_count', _decode_links)
+  liker_count = _lazy('_lazy_liker_count', _decode_links)
+
+  def _decode_verb(self, json):
+    if isinstance(json.get('verb'), list):
+      self._lazy_verb = json['verb'][0]
+    else:
+      self._lazy_verb = json.get('verb') or None
+  verb = _lazy('_lazy_verb', _decode_verb)
+
+  def _decode_published(self, json):
+    self._lazy_published = json.get('published') or None
+  published = _lazy('_lazy_published', _decode_published)
+
+  def _decode_updated(self, json):
+    self._lazy_updated = json.get('updated') or None
+  updated = _lazy('_lazy_updated', _decode_updated)
+
+  def _decode_type(self, json):
+    if isinstance(json.get('type'), list):
+      self._lazy_type = json['type'][0]
+    elif json.get('type'):
+      self._lazy_type = json['type']
+    elif self.object and self.object.get('type'):
+      self._lazy_type = self.object['type']
+    else:
+      self._lazy_type = None
+  type = _lazy('_lazy_type', _decode_type)
+
+  def _decode_actor(self, json):
+    if json.get('author'):
+      self._lazy_actor = Person(json['author'], client=self.client)
+    elif json.get('actor'):
+      self._lazy_actor = Person(json['actor'], client=self.client)
+    else:
+      self._lazy_actor = None
+  actor = _lazy('_lazy_actor', _decode_actor)
+
+  def _decode_attachments(self, json):
+    if self.object and self.object.get('attachments'):
+      self._lazy_attachments = [
+        Attachment(attachment_json, client=self.client)
+        for attachment_json
+        in self.object['attachments']
+      ]
+    else:
+      self._lazy_attachments = []
+  attachments = _lazy('_lazy_attachments', _decode_attachments)
+
+  def _decode_geocode(self, json):
+    if json.get('geocode'):
+      self._lazy_geocode = _parse_geocode(json['geocode'])
+    else:
+      self._lazy_geocode = None
+  geocode = _lazy('_lazy_geocode', _decode_geocode)
+
+  def _decode_place_name(self, json):
+    self._lazy_place_name = json.get('placeName') or None
+  place_name = _lazy('_lazy_place_name', _decode_place_name)
+
+  def _decode_visibility(self, json):
+    visibility = json.get('visibility') or None
+    if isinstance(visibility, dict) and visibility.get('entries'):
+      visibility = visibility.get('entries')
+    self._lazy_visibility = visibility
+  visibility = _lazy('_lazy_visibility', _decode_visibility)
+
+  def _decode_placeholder(self, json):
+    self._lazy_placeholder = json.get('placeholder') or None
+  placeholder = _lazy('_lazy_placeholder', _decode_placeholder)
+
+  def release_json(self):
+    """Decodes every field that has not been read yet and drops the json."""
+    _release_json(self, self._lazy_fields)
 
   def __repr__(self):
     if not self.public:
@@ -1017,11 +1857,13 @@ class Post:
       ]
     return output
 
-  def comments(self, client=None):
+  def comments(self, client=None, fields=None):
     """Syntactic sugar for `client.comments(post)`."""
     if not client:
       client = self.client
-    return self.client.comments(post_id=self.id, actor_id=self.actor.id)
+    return self.client.comments(
+      post_id=self.id, actor_id=self.actor.id, fields=fields
+    )
 
   def related_links(self, client=None):
     """Syntactic sugar for `client.related_links(post)`."""
@@ -1059,20 +1901,28 @@ class Post:
       client = self.client
     return client.unmute_post(post_id=self.id)
 
-class Comment:
+class Comment(object):
+  """
+  A comment on a Buzz post.  Only the id is decoded up front, every other
+  field is decoded from the json when it is first read.  L{release_json}
+  decodes the rest and drops the json.
+  """
+  _lazy_fields = (
+    'content', 'actor', 'links', '_post_id', 'published', 'updated'
+  )
+  __slots__ = (
+    'client', 'json', '_raw', 'id', '_post', '_given_post_id'
+  ) + _lazy_slots(_lazy_fields)
+
   def __init__(self, json=None, client=None,
       post=None, post_id=None, content=None):
     self.client = client
     self.json = json
+    self._raw = None
     self.id = None
-    self.content = content
-    self.actor = None
-    self.links = []
     self._post = post
-    self._post_id = post_id
-    self.published=None
-    self.updated=None
-    
+    self._given_post_id = post_id
+
     if json:
       # Follow Postel's law
       try:
@@ -1080,32 +1930,65 @@ class Comment:
         if json.get('error'):
           raise JSONParseError(json=json)
         self.id = json['id']
-        if isinstance(json.get('content'), dict):
-          self.content = json['content']['value']
-        elif json.get('content'):
-          self.content = json['content']
-        elif json.get('object') and json['object'].get('content'):
-          self.content = json['object']['content']
-        if json.get('author'):
-          self.actor = Person(json['author'], client=self.client)
-        elif json.get('actor'):
-          self.actor = Person(json['actor'], client=self.client)
-        if json.get('links'):
-          self.links = _parse_links(json.get('links'))
-        if self.links:
-          for link in self.links:
-            if link.rel == "inReplyTo":
-              self._post_id = link.id
-              break
-        if json.get('published'):
-          self.published = json['published']
-        if json.get('updated'):
-          self.updated = json['updated']
       except KeyError, e:
         raise JSONParseError(
           json=json,
           exception=e
         )
+      self._raw = json
+      for slot in _lazy_slots(self._lazy_fields):
+        setattr(self, slot, _UNDECODED)
+    else:
+      self._lazy_content = content
+      self._lazy_actor = None
+      self._lazy_links = []
+      self._lazy__post_id = post_id
+      self._lazy_published = None
+      self._lazy_updated = None
+
+  def _decode_content(self, json):
+    if isinstance(json.get('content'), dict):
+      self._lazy_content = json['content']['value']
+    elif json.get('content'):
+      self._lazy_content = json['content']
+    elif json.get('object') and json['object'].get('content'):
+      self._lazy_content = json['object']['content']
+    else:
+      self._lazy_content = None
+  content = _lazy('_lazy_content', _decode_content)
+
+  def _decode_actor(self, json):
+    if json.get('author'):
+      self._lazy_actor = Person(json['author'], client=self.client)
+    elif json.get('actor'):
+      self._lazy_actor = Person(json['actor'], client=self.client)
+    else:
+      self._lazy_actor = None
+  actor = _lazy('_lazy_actor', _decode_actor)
+
+  def _decode_links(self, json):
+    self._lazy_links = []
+    self._lazy__post_id = self._given_post_id
+    if json.get('links'):
+      self._lazy_links = _parse_links(json.get('links'))
+    for link in self._lazy_links:
+      if link.rel == "inReplyTo":
+        self._lazy__post_id = link.id
+        break
+  links = _lazy('_lazy_links', _decode_links)
+  _post_id = _lazy('_lazy__post_id', _decode_links)
+
+  def _decode_published(self, json):
+    self._lazy_published = json.get('published') or None
+  published = _lazy('_lazy_published', _decode_published)
+
+  def _decode_updated(self, json):
+    self._lazy_updated = json.get('updated') or None
+  updated = _lazy('_lazy_updated', _decode_updated)
+
+  def release_json(self):
+    """Decodes every field that has not been read yet and drops the json."""
+    _release_json(self, self._lazy_fields)
 
   def __repr__(self):
     return (u'<Comment[%s]>' % self.id).encode(
@@ -1284,42 +2167,162 @@ class Attachment:
       }
     return output
 
-class Person:
+# The last segment of a profile URI, and a numeric one
+_PROFILE_PATH = re.compile('/([^/]*?)$')
+_NUMERIC = re.compile('^\\d+$')
+
+class PersonIdentity(tuple):
+  """
+  The identity of a Buzz user: id, name, profile name, photo and uri.
+  Immutable, and shared through L{IdentityCache} by every L{Person} of the
+  same user.
+  """
+  __slots__ = ()
+
+  def __new__(cls, id, name, profile_name, photo, uri):
+    return tuple.__new__(cls, (id, name, profile_name, photo, uri))
+
+  id = property(operator.itemgetter(0))
+  name = property(operator.itemgetter(1))
+  profile_name = property(operator.itemgetter(2))
+  photo = property(operator.itemgetter(3))
+  uri = property(operator.itemgetter(4))
+
+  def __repr__(self):
+    return (u'<PersonIdentity[%s, %s]>' % (self.name, self.id)).encode(
+      'ASCII', 'ignore'
+    )
+
+def _parse_identity(json):
+  """Builds the PersonIdentity of a person's json."""
+  uri = json.get('uri') or json.get('profileUrl') or None
+  last = None
+  if uri:
+    match = _PROFILE_PATH.search(uri)
+    if match:
+      last = match.group(1)
+  profile_name = None
+  if last is not None and not _NUMERIC.match(last):
+    profile_name = last
+  photo = json.get('photoUrl') or json.get('thumbnailUrl')
+  if photo and photo.startswith('/photos/public/'):
+    photo = 'http://www.google.com/s2' + photo
+  return PersonIdentity(
+    json.get('id') or last,
+    json.get('name') or json.get('displayName'),
+    profile_name,
+    photo,
+    uri
+  )
+
+class IdentityCache:
+  """
+  Interns L{PersonIdentity} records, so a user who shows up on many posts
+  and comments is parsed once and every L{Person} of that user shares one
+  record.
+
+  Records are keyed by the id and uri and the other json fields they are
+  built from, so a user who changes name gets a new record.  Up to
+  C{size} records are kept; a full cache is emptied and starts over.  The
+  cache may be shared between threads without a lock: at worst two
+  threads parse the same user and one of the records is kept.
+  """
+  def __init__(self, size=IDENTITY_CACHE_SIZE):
+    self.size = size
+    self._records = {}
+    self.hits = 0
+    self.misses = 0
+
+  def identity(self, json):
+    """Returns the PersonIdentity of a person's json."""
+    get = json.get
+    key = (
+      get('id'), get('uri'), get('profileUrl'), get('name'),
+      get('displayName'), get('photoUrl'), get('thumbnailUrl')
+    )
+    try:
+      record = self._records.get(key)
+    except TypeError:
+      # A field that is not a string, parsed but not kept
+      return _parse_identity(json)
+    if record is not None:
+      self.hits += 1
+      return record
+    self.misses += 1
+    record = _parse_identity(json)
+    if len(self._records) >= self.size:
+      self._records = {}
+    self._records[key] = record
+    return record
+
+  def clear(self):
+    self._records = {}
+
+  def stats(self):
+    return {
+      'hits': self.hits,
+      'misses': self.misses,
+      'entries': len(self._records)
+    }
+
+identity_cache = IdentityCache()
+
+class Person(object):
+  """
+  A Buzz user.  Every field is decoded from the json when it is first read,
+  the identity fields (id, name, profile name, photo and uri) together
+  from the shared L{PersonIdentity} in L{identity_cache}.  L{release_json}
+  decodes the rest and drops the json.
+  """
+  _lazy_fields = (
+    'identity', 'uri', 'id', 'name', 'photo', 'uris', 'photos',
+    'profile_name'
+  )
+  _lazy_slot_names = _lazy_slots(_lazy_fields)
+  __slots__ = ('client', 'json', '_raw') + _lazy_slot_names
+
   def __init__(self, json, client=None):
     self.client = client
     self.json = json
-    self.profile_name = None
     # Follow Postel's law
-    try:
-      json = _prune_json_envelope(json)
-      if json.get('error'):
-        raise JSONParseError(json=json)
-      self.uri = \
-        json.get('uri') or json.get('profileUrl')
-      if self.uri == "":
-        self.uri = None
-      if json.get('id'):
-        self.id = json.get('id')
-      elif self.uri:
-        self.id = re.search('/([^/]*?)$', self.uri).group(1)
-      self.name = \
-        json.get('name') or json.get('displayName')
-      self.photo = \
-        json.get('photoUrl') or json.get('thumbnailUrl')
-      if self.photo and self.photo.startswith('/photos/public/'):
-        self.photo = 'http://www.google.com/s2' + self.photo
-      if json.get('urls'):
-        self.uris = json.get('urls')
-      if json.get('photos'):
-        self.photos = json.get('photos')
-      if self.uri and \
-          not re.search('^\\d+$', re.search('/([^/]*?)$', self.uri).group(1)):
-        self.profile_name = re.search('/([^/]*?)$', self.uri).group(1)
-    except KeyError, e:
-      raise JSONParseError(
-        json=json,
-        exception=e
-      )
+    json = _prune_json_envelope(json)
+    if json.get('error'):
+      raise JSONParseError(json=json)
+    self._raw = json
+    for slot in self._lazy_slot_names:
+      setattr(self, slot, _UNDECODED)
+
+  def _decode_identity(self, json):
+    identity = self._lazy_identity = identity_cache.identity(json)
+    # Fields assigned before the identity was decoded keep their value
+    if self._lazy_id is _UNDECODED:
+      self._lazy_id = identity[0]
+    if self._lazy_name is _UNDECODED:
+      self._lazy_name = identity[1]
+    if self._lazy_profile_name is _UNDECODED:
+      self._lazy_profile_name = identity[2]
+    if self._lazy_photo is _UNDECODED:
+      self._lazy_photo = identity[3]
+    if self._lazy_uri is _UNDECODED:
+      self._lazy_uri = identity[4]
+  identity = _lazy('_lazy_identity', _decode_identity)
+  uri = _lazy('_lazy_uri', _decode_identity)
+  id = _lazy('_lazy_id', _decode_identity)
+  name = _lazy('_lazy_name', _decode_identity)
+  photo = _lazy('_lazy_photo', _decode_identity)
+  profile_name = _lazy('_lazy_profile_name', _decode_identity)
+
+  def _decode_uris(self, json):
+    self._lazy_uris = json.get('urls') or None
+  uris = _lazy('_lazy_uris', _decode_uris)
+
+  def _decode_photos(self, json):
+    self._lazy_photos = json.get('photos') or None
+  photos = _lazy('_lazy_photos', _decode_photos)
+
+  def release_json(self):
+    """Decodes every field that has not been read yet and drops the json."""
+    _release_json(self, self._lazy_fields)
 
   def __repr__(self):
     return (u'<Person[%s, %s]>' % (self.name, self.id)).encode(
@@ -1358,11 +2361,17 @@ class Person:
     return client.posts(user_id=self.id)
 
 class Result:
-  def __init__(self, client, http_method, http_uri, http_headers={}, \
-      http_body='', result_type=Post, singular=False):
+  def __init__(self, client, http_method, http_uri, http_headers=None, \
+      http_body='', result_type=Post, singular=False, fields=None):
+    """
+    With C{fields}, dotted names such as C{('content', 'actor.id')}, only
+    those fields of each result are decoded, and the results come back
+    without the others.
+    """
     self.client = client
     self.result_type = result_type
     self.singular = singular
+    self.fields = fields
 
     # The HTTP response for the current page
     self._response = None
@@ -1377,13 +2386,100 @@ class Result:
 
     self._http_method = http_method
     self._http_uri = http_uri
-    self._http_headers = http_headers
+    self._http_headers = http_headers or {}
     self._http_body = http_body
     self.poco_count = 0
 
   def __iter__(self):
     return ResultIterator(self)
 
+  def prefetch(self, depth=PREFETCH_DEPTH):
+    """
+    Returns an iterator over the results that fetches up to C{depth} pages
+    ahead in a background thread while the current page is consumed.  Falls
+    back to L{stream} when threads are not available.
+    """
+    if depth < 1:
+      return ResultIterator(self)
+    if not THREADS_AVAILABLE:
+      return self.stream()
+    return PrefetchingResultIterator(self, depth)
+
+  def stream(self):
+    """
+    Generator over the results, decoding each page as it is read from the
+    connection.  A result is handed out as soon as it has been decoded
+    rather than once its page has arrived, and pages are not kept on the
+    Result, so only the results still referenced by the caller are held.
+    A page already loaded is handed out first.
+    """
+    if self.singular or self.result_type not in (Post, Comment, Person):
+      for value in ResultIterator(self):
+        yield value
+      return
+    if self._response:
+      for value in self.data:
+        yield value
+      if not self.next_uri:
+        return
+      self.load_next()
+    while True:
+      for value in self._stream_page():
+        yield value
+      if not self._json or not self.next_uri:
+        return
+      self.load_next()
+
+  def _stream_page(self):
+    self._data = None
+    http_uri, decoder = self._request_uri()
+    self._response = self.client.fetch_api_response(
+      http_method=self._http_method,
+      http_uri=http_uri,
+      http_headers=self._http_headers,
+      http_body=self._http_body,
+      stream=True
+    )
+    try:
+      if not (self._response.status >= 200 and self._response.status < 300):
+        try:
+          self._json = simplejson.loads(self._response.read())
+        except ValueError:
+          self._json = None
+        self._parse_error(self._json)
+      decode_result = None
+      if decoder:
+        decode_result = decoder._result
+      results = StreamingDecoder(self._response.read, decode_result)
+      try:
+        for json in results:
+          yield self.result_type(json, client=self.client)
+      except (socket.error, httplib.HTTPException), e:
+        raise RetrieveError(uri=self._http_uri, exception=e)
+      except ValueError, e:
+        raise JSONParseError(
+          json=results.envelope,
+          uri=self._http_uri,
+          exception=e
+        )
+      self._json = results.envelope
+    finally:
+      self._response.close()
+      # The page was not kept, so data loads it again
+      self._response = None
+
+  def pages(self):
+    """
+    Generator over the parsed data of each page of results.  The next page
+    is only requested once the previous page has been consumed, and only
+    the current page is held in memory.
+    """
+    while True:
+      yield self.data
+      if not self.next_uri:
+        return
+      self.load_next()
+
   @property
   def data(self):
     if not self._data:
@@ -1415,9 +2511,10 @@ class Result:
       logging.debug('URI to fetch is %s' % self._http_uri)
       logging.debug('Headers are: %s' % str(self._http_headers))
     self._data = None
+    http_uri, decoder = self._request_uri()
     self._response = self.client.fetch_api_response(
       http_method=self._http_method,
-      http_uri=self._http_uri,
+      http_uri=http_uri,
       http_headers=self._http_headers,
       http_body=self._http_body
     )
@@ -1425,6 +2522,8 @@ class Result:
     try:
       if self._body == '':
         self._json = None
+      elif decoder:
+        self._json = decoder.decode(self._body)
       else:
         self._json = simplejson.loads(self._body)
     except Exception, e:
@@ -1434,6 +2533,16 @@ class Result:
         exception=e
       )
 
+  def _request_uri(self):
+    """The URI to request and the ProjectedDecoder for the fields, if any."""
+    decoder = None
+    http_uri = self._http_uri
+    if self.fields:
+      decoder = _projected_decoder(self.result_type, self.fields)
+      if PARTIAL_RESPONSE and 'fields=' not in http_uri:
+        http_uri += '&fields=' + urllib.quote(decoder.selector, safe=',()')
+    return http_uri, decoder
+
   def load_next(self):
     if self.next_uri:
       self._http_uri = self.next_uri
@@ -1446,6 +2555,16 @@ class Result:
     else:
       raise ValueError('Cannot load next page, next page not present.')
 
+  def _adopt(self, page):
+    """Takes over the state of a separately loaded next page."""
+    self._http_uri = page._http_uri
+    self._next_uri = page._next_uri
+    self._response = page._response
+    self._body = page._body
+    self._json = page._json
+    self._data = page._data
+    self.poco_count = page.poco_count
+
   @property
   def next_uri(self):
     if not self._next_uri:
@@ -1667,3 +2786,99 @@ class ResultIterator:
     value = self.result.data[self.local_index]
     self.cursor += 1
     return value
+
+class PageFetcher(threading.Thread):
+  """
+  Background thread loading the pages after the current page of a
+  L{Result}, in order.  At most C{depth} loaded pages wait in its queue, so
+  memory stays bounded however far the consumer lags.  An error ends the
+  fetch and is queued in place of the page it happened on.
+  """
+  def __init__(self, result, depth):
+    threading.Thread.__init__(self)
+    self.setDaemon(True)
+    self.client = result.client
+    self.result_type = result.result_type
+    self.fields = result.fields
+    self.http_headers = result._http_headers
+    # next_uri may advance the PoCo counter, so read it before copying it
+    self.uri = result.next_uri
+    self.poco_count = result.poco_count
+    self.pages = Queue.Queue(depth)
+    self.stopped = False
+
+  def _put(self, item):
+    # Wait for room, but give up once the consumer has stopped
+    while not self.stopped:
+      try:
+        self.pages.put(item, True, 0.5)
+        return True
+      except Queue.Full:
+        pass
+    return False
+
+  def run(self):
+    uri = self.uri
+    poco_count = self.poco_count
+    while uri:
+      try:
+        page = Result(
+          self.client, 'GET', uri, http_headers=dict(self.http_headers),
+          result_type=self.result_type, fields=self.fields
+        )
+        page.poco_count = poco_count
+        page.data
+        uri = page.next_uri
+        poco_count = page.poco_count
+      except:
+        self._put((None, sys.exc_info()))
+        return
+      if not self._put((page, None)):
+        return
+    self._put((None, None))
+
+  def next_page(self):
+    """Returns the next loaded page, or None after the last one."""
+    page, error = self.pages.get()
+    if error:
+      raise error[0], error[1], error[2]
+    return page
+
+  def stop(self):
+    self.stopped = True
+
+class PrefetchingResultIterator(ResultIterator):
+  """
+  A L{ResultIterator} that has the next pages fetched and parsed in the
+  background while the current page is consumed.  Results come back in the
+  same order as from L{ResultIterator}, and an error on a page is raised
+  when the consumer reaches that page.
+  """
+  def __init__(self, result, depth=PREFETCH_DEPTH):
+    ResultIterator.__init__(self, result)
+    self.depth = depth
+    self.fetcher = None
+
+  def next(self):
+    if self.fetcher is None:
+      # The current page is loaded here, the fetcher starts after it
+      self.result.data
+      self.fetcher = PageFetcher(self.result, self.depth)
+      self.fetcher.start()
+    while self.local_index >= len(self.result.data):
+      page = self.fetcher.next_page()
+      if page is None:
+        raise StopIteration('No more results.')
+      self.start_index += len(self.result.data)
+      self.result._adopt(page)
+    # The local_index is in range of the current page
+    value = self.result.data[self.local_index]
+    self.cursor += 1
+    return value
+
+  def close(self):
+    if self.fetcher is not None:
+      self.fetcher.stop()
+
+  def __del__(self):
+    self.close()
@@ -17,13 +17,21 @@ from google.appengine.api.labs import taskqueue
 import os
 import traceback
 import time
+import datetime
 import buzz
 import yaml
 import logging
 
 import lib.referee
+import lib.prescreen
+import lib.post_snapshot
+import lib.task_batch
+import lib.worker_pool
 import utils.consts
-from models.decision_cache import DecisionCache
+from models.decision_cache import undecided_post_ids, mark_decided
+from models.post_evaluation import changed_posts, unchanged_post_ids, \
+    record_evaluations
+from models.stream_state import StreamState, CONSUMPTION_STREAM
 
 OAUTH_CONFIG = yaml.load(open('oauth.yaml').read())
 
@@ -32,6 +40,24 @@ OAUTH_CONSUMER_SECRET = OAUTH_CONFIG['oauth_consumer_secret']
 OAUTH_TOKEN_KEY = OAUTH_CONFIG['oauth_token_key']
 OAUTH_TOKEN_SECRET = OAUTH_CONFIG['oauth_token_secret']
 
+# posts requested per page of the consumption feed
+CONSUMPTION_PAGE_SIZE = 100
+# seconds queue_ref may spend paging before it saves its place
+QUEUE_REF_DEADLINE = 20
+# posts evaluated per /ref task
+REF_BATCH_SIZE = 10
+# posts of a batch fetched and scored at the same time; where threads
+# cannot be started (buzz.THREADS_AVAILABLE), as on the python (2.5)
+# runtime, they are scored one after the other
+REF_WORKERS = 4
+
+# the post fields queue_ref and the prescreen read, consumption pages
+# are decoded with only these
+POST_FIELDS = (
+  'placeholder', 'actor.id', 'actor.name', 'updated', 'links.replies',
+  'content', 'object.content'
+)
+
 class BuzzRefereeHandler(webapp.RequestHandler):
   # handle to the buzz client with auth for buzzreferee
   @property
@@ -76,12 +102,17 @@ class BuzzRefereeHandler(webapp.RequestHandler):
 
   # POST
   def post(self):
-    post_id = self.request.get('post_id')
+    post_ids = self.request.get_all('post_id')
 
     message = ''
 
-    if post_id:
-      message = self.ref_post(post_id)
+    if post_ids:
+      message = self.ref_posts(
+        post_ids,
+        self.request.get_all('comment_count'),
+        self.request.get_all('updated'),
+        self.request.get_all('snapshot')
+      )
     else:
       message = self.queue_ref()
 
@@ -95,71 +126,218 @@ class BuzzRefereeHandler(webapp.RequestHandler):
     )
     self.response.out.write(template.render(path, template_values))
 
-  # get available posts for examination and queue the posts one-at-a-time
-  # in the taskqueue
+  # page through the consumption feed and queue one task per
+  # undecided post in the taskqueue, a page at a time
+  # incremental scans stop at the high-water mark of the last completed
+  # scan, a periodic full scan reads the whole feed
+  # a tick that runs out of time saves its place and the next tick
+  # resumes from there
   # filtering by dates is not desired - old posts are just as eligible as new
   def queue_ref(self):
+    started = time.time()
+    now = datetime.datetime.now()
+    state = StreamState.get_by_key_name(CONSUMPTION_STREAM)
+    if state is None:
+      state = StreamState(key_name=CONSUMPTION_STREAM)
+
     # get consumption posts
-    posts = self.client.posts(type_id='@consumption', user_id='@me', max_results=5000).data
+    posts = None
+    ret_str = ''
+    if state.next_uri:
+      posts = buzz.Result(
+        self.client, 'GET', state.next_uri, result_type=buzz.Post,
+        fields=POST_FIELDS
+      )
+      try:
+        # load the saved page up front, one that has expired or fails
+        # starts a fresh scan instead of failing every tick
+        posts.data
+        ret_str = 'Resuming at: ' + state.next_uri + '<br />'
+      except buzz.RetrieveError, e:
+        logging.warning('queue_ref: cannot resume, starting over: %s' % e)
+        ret_str = 'Cannot resume at: ' + state.next_uri + \
+            ', starting over<br />'
+        state.next_uri = None
+        posts = None
+    if posts is None:
+      posts = self.client.posts(
+        type_id='@consumption', user_id='@me',
+        max_results=CONSUMPTION_PAGE_SIZE, fields=POST_FIELDS
+      )
+    state.start_scan(now)
+    if state.full_scan:
+      ret_str += 'Full scan<br />'
 
-    ret_str = '#posts: ' + str(len(posts)) + '<br />'
+    num_posts = 0
+    next_uri = None
+    reached_high_water = False
+    for page in posts.pages():
+      num_posts += len(page)
+      new_posts = []
+      for post in page:
+        if state.seen(post):
+          reached_high_water = True
+        else:
+          state.observe(post)
+          new_posts.append(post)
+      ret_str += self.queue_posts(new_posts)
+      if reached_high_water:
+        ret_str += 'Reached high-water mark: ' + state.high_water + '<br />'
+        break
+      if time.time() - started > QUEUE_REF_DEADLINE:
+        next_uri = posts.next_uri
+        break
 
-    for post in posts:
-      
-      if DecisionCache.get_by_key_name(str(post.id[25:])) is None and \
-          post.placeholder is None and \
-          post.actor.id != utils.consts.BUZZREFEREE_ID:
-        try:
-          result_task = taskqueue.Task(
-            name="%s-%d" % (post.id[25:], int(time.time())),
-            params={
-              'post_id': post.id
-            },
-            url='/ref',
-            countdown=1
-          )
-          result_task.add()
-          ret_str += 'Added post id: ' + post.id + '<br />'
-        except:
-          result_task = None
-          ret_str += 'taskqueue exception<br />'
+    if next_uri:
+      state.next_uri = next_uri
+    else:
+      state.finish_scan(now)
+    state.put()
 
+    ret_str = '#posts: ' + str(num_posts) + '<br />' + ret_str
+    if next_uri:
+      ret_str += 'Out of time, next tick resumes at: ' + next_uri + '<br />'
+    ret_str += self.stats_str()
     return ret_str
 
-  # make a referee decision for the given buzz post
-  def ref_post(self, post_id):
+  # queue a task for each undecided post in a page of the consumption feed
+  def queue_posts(self, posts):
     ret_str = ''
-    logging.info('ref_post called with id: ' + post_id)
+
+    posts = [
+      post for post in posts
+      if post.placeholder is None and \
+          post.actor.id != utils.consts.BUZZREFEREE_ID
+    ]
+    # posts whose own payload rules out a call are not queued
+    posts = lib.prescreen.payload_candidates(posts)
+    # one batched check against the decision cache for all posts
+    undecided = undecided_post_ids([post.id for post in posts])
+    # and skip those that have not moved since they were last evaluated
+    posts = changed_posts([post for post in posts if post.id in undecided])
+
+    tasks = []
+    for i in xrange(0, len(posts), REF_BATCH_SIZE):
+      batch = posts[i:i+REF_BATCH_SIZE]
+      tasks.append(taskqueue.Task(
+        name="%s-%d-%d" % (batch[0].id[25:], len(batch), int(time.time())),
+        params={
+          'post_id': [post.id for post in batch],
+          'comment_count': [str(post.comment_count) for post in batch],
+          'updated': [post.updated or '' for post in batch],
+          'snapshot': [lib.post_snapshot.snapshot(post) for post in batch]
+        },
+        url='/ref',
+        countdown=1
+      ))
+      for post in batch:
+        ret_str += 'Queueing post id: ' + post.id + '<br />'
+
+    if tasks:
+      stats = lib.task_batch.add_tasks(tasks)
+      ret_str += 'Tasks added: %(added)d, duplicate: %(duplicate)d, ' \
+          'failed: %(failed)d<br />' % stats
+
+    return ret_str
+
+  # the prescreen, connection and cache counters, reported once a tick
+  def stats_str(self):
+    ret_str = 'Prescreen: ' + lib.prescreen.counters_str() + '<br />'
+    ret_str += 'Connections: %(hits)d hits, %(misses)d misses, ' \
+        '%(reconnects)d reconnects<br />' % self.client.pool.stats()
+    ret_str += 'Identity cache: %(hits)d hits, %(misses)d misses<br />' % \
+        buzz.identity_cache.stats()
+    ret_str += 'JSON backend: %s (%s)<br />' % (
+      buzz.JSON_BACKEND, buzz.JSON_ACCELERATED and 'C speedups' or 'pure Python'
+    )
+    return ret_str
+
+  # make referee decisions for a batch of buzz posts
+  # comment_counts and updateds are the posts' values when they were
+  # queued, a post that matches its last evaluation is not fetched again
+  # snapshots are the posts' task snapshots, used instead of fetching the
+  # post again unless they are stale
+  # the posts are fetched and scored on REF_WORKERS threads sharing the
+  # client where threads are available, comments are written once all are
+  # scored and each decision is recorded as soon as its comment is written
+  def ref_posts(self, post_ids, comment_counts=[], updateds=[], snapshots=[]):
+    ret_str = ''
+    logging.info('ref_posts called with ids: ' + ', '.join(post_ids))
+    undecided = undecided_post_ids(post_ids)
+    versions = {}
+    restored = {}
+    for post_id, comment_count, updated, snapshot in \
+        map(None, post_ids, comment_counts, updateds, snapshots):
+      if post_id in undecided and comment_count:
+        versions[post_id] = (int(comment_count), updated or None)
+        restored[post_id] = lib.post_snapshot.restore(
+          self.client, post_id, snapshot, comment_count, updated
+        )
+    unchanged = unchanged_post_ids(versions)
+
+    jobs = []
+    for post_id in post_ids:
+      if post_id not in undecided:
+        ret_str += 'Already decided post.id = ' + post_id + '<br />'
+      elif post_id in unchanged:
+        ret_str += 'Unchanged since last evaluation post.id = ' + \
+            post_id + '<br />'
+      elif post_id not in [job[0] for job in jobs]:
+        jobs.append((post_id, restored.get(post_id)))
+
+    results = lib.worker_pool.map_bounded(self.evaluate_post, jobs, REF_WORKERS)
+    logging.info('prescreen: ' + lib.prescreen.counters_str())
+
+    evaluated = []
     try:
-      post = self.client.post(post_id).data
-      ref = lib.referee.Referee(post)
-      decision = ref.referee_decision
-      if decision is not None:
+      for (post_id, snapshot), (result, error) in zip(jobs, results):
+        if error:
+          ret_str += "<h2>Error:</h2><br />" + "Getting post: " + post_id + \
+              "<br />" + "<pre>"  + error  + "</pre>"
+          continue
+        post, decision, winner_id = result
+        if decision is None:
+          # nothing to say until a new comment or edit moves the post
+          evaluated.append(post)
+          ret_str += 'Nothing to say on post.id = ' + post_id + '<br />'
+          continue
         # post here
         try:
           new_comment = buzz.Comment(content=decision, post_id=post_id)
           self.client.create_comment(new_comment)
-
-          # cache this decision
-          pid = str(post.id[25:])
-          if DecisionCache.get_by_key_name(pid) is None:
-            new_decision = DecisionCache(key_name=pid)
-            new_decision.winner_id = str(ref.winner.id)
-            new_decision.put()
-
-          ret_str = "Writing comment: " + decision + "<br />" + \
-              "to post.id = " + post.id
         except:
-          ret_str = "<h2>Error:</h2><br />" + "Writing comment: " + \
+          ret_str += "<h2>Error:</h2><br />" + "Writing comment: " + \
               decision + "<br />" + "to post.id = " + post.id + \
               "<br />" + "<pre>"  + traceback.format_exc()  + "</pre>"
-    except:
-      ret_str = "<h2>Error:</h2><br />" + "Getting post: " + post_id + \
-          "<br />" + "<pre>"  + traceback.format_exc()  + "</pre>"
+          continue
+        # cache the decision right away, so a failure later in the batch
+        # cannot leave a post with a comment but without a decision
+        mark_decided(post.id, winner_id)
+        ret_str += "Writing comment: " + decision + "<br />" + \
+            "to post.id = " + post.id + "<br />"
+    finally:
+      # cache the evaluations
+      record_evaluations(evaluated)
 
     logging.info('returning: ' + ret_str)
     return ret_str
 
+  # fetch and score one post, returns (post, decision, winner_id)
+  # with a decision of None if there is nothing to say
+  # job is (post_id, snapshot), the post is only fetched without snapshot
+  def evaluate_post(self, job):
+    post_id, post = job
+    if post is None:
+      post = self.client.post(post_id).data
+    is_candidate, comments = lib.prescreen.screen(post)
+    if not is_candidate:
+      return (post, None, None)
+    ref = lib.referee.Referee(post, comments)
+    decision = ref.referee_decision
+    if decision is None:
+      return (post, None, None)
+    return (post, decision, ref.winner.id)
+
   # just for testing
   def force_post(self):
     # get consumption posts
@@ -0,0 +1,24 @@
+"""
+decided_filter.py:
+Handler for the task that backfills the decided filter.
+
+* Author:       Mitchell Bowden <mitchellbowden AT gmail DOT com>
+* License:      MIT License: http://creativecommons.org/licenses/MIT/
+"""
+
+from google.appengine.ext import webapp
+from google.appengine.api.labs import taskqueue
+
+import models.decision_cache
+
+class DecidedFilterHandler(webapp.RequestHandler):
+  # add a run of DecisionCache keys to the filter, and queue the next run
+  # until all of them are in
+  def post(self):
+    after = models.decision_cache.backfill_filter(
+      self.request.get('after') or None
+    )
+    if after:
+      taskqueue.Task(
+        url=models.decision_cache.BACKFILL_URL, params={'after': after}
+      ).add()
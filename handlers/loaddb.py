@@ -12,6 +12,7 @@ from google.appengine.ext import db
 import os
 import sys
 import models.phrase
+import lib.phrase_table
 
 class LoadDbHandler(webapp.RequestHandler):
   def get(self):
@@ -24,11 +25,14 @@ class LoadDbHandler(webapp.RequestHandler):
 
   def loaddb(self):
     # clear db first
-    past_phrases = db.GqlQuery("SELECT * FROM Phrase")
-    for pastp in past_phrases:
-      pastp.delete()
+    past_phrases = db.GqlQuery("SELECT __key__ FROM Phrase")
+    past_keys = past_phrases.fetch(500)
+    while past_keys:
+      db.delete(past_keys)
+      past_keys = past_phrases.fetch(500)
 
-    # load every phrase type
+    # load every phrase type, numbering the phrases of each type 0..n-1
+    counts = {}
     for t in models.phrase.phrase_types:
       try:
         path = os.path.join(
@@ -38,6 +42,16 @@ class LoadDbHandler(webapp.RequestHandler):
       except IOError:
         continue
       else:
+        new_phrases = []
         for p in df:
-          np = models.phrase.Phrase(type=t, str=p.rstrip('\n'))
-          np.put()
+          ordinal = len(new_phrases)
+          np = models.phrase.Phrase(
+            key_name=models.phrase.phrase_key_name(t, ordinal),
+            type=t, str=p.rstrip('\n'), ordinal=ordinal
+          )
+          new_phrases.append(np)
+        db.put(new_phrases)
+        counts[t] = len(new_phrases)
+
+    # make every instance reload its phrase table
+    lib.phrase_table.bump_generation(counts)
@@ -0,0 +1,63 @@
+"""
+bloom_filter.py:
+
+A Bloom filter over strings. A negative answer from might_contain() is
+always right; a positive one may be a false positive and has to be
+confirmed elsewhere. The bits round-trip through a string so the filter
+can be stored in a db.BlobProperty, and the size of a filter is the
+length of that string.
+
+* Author:       Mitchell Bowden <mitchellbowden AT gmail DOT com>
+* License:      MIT License: http://creativecommons.org/licenses/MIT/
+"""
+
+import array
+import hashlib
+import struct
+
+# 2^16 bits (8KB) by default; 7 hashes and 10 bits per member give
+# ~1% false positives
+NUM_BITS_LOG2 = 16
+NUM_HASHES = 7
+BITS_PER_MEMBER = 10
+
+# the log2 of the smallest number of bits that holds the given number
+# of members at BITS_PER_MEMBER
+def bits_log2_for(members):
+  log2 = 3
+  while (1 << log2) < members * BITS_PER_MEMBER:
+    log2 += 1
+  return log2
+
+class BloomFilter(object):
+  def __init__(self, bits=None, num_bits_log2=NUM_BITS_LOG2):
+    self.bits = array.array('B')
+    if bits:
+      self.bits.fromstring(bits)
+    size = len(self.bits)
+    if size < 1 or size & (size - 1):
+      # missing or not a power of two, start empty
+      self.bits = array.array('B', [0]) * ((1 << num_bits_log2) / 8)
+    self.num_bits = len(self.bits) * 8
+
+  # the bit positions of a member, by double hashing the two halves of
+  # its md5 digest
+  def positions(self, member):
+    h1, h2 = struct.unpack('<QQ', hashlib.md5(member).digest())
+    # an odd step visits distinct positions
+    h2 |= 1
+    mask = self.num_bits - 1
+    return [int((h1 + i * h2) & mask) for i in xrange(NUM_HASHES)]
+
+  def add(self, member):
+    for p in self.positions(member):
+      self.bits[p >> 3] |= 1 << (p & 7)
+
+  def might_contain(self, member):
+    for p in self.positions(member):
+      if not self.bits[p >> 3] & (1 << (p & 7)):
+        return False
+    return True
+
+  def to_string(self):
+    return self.bits.tostring()
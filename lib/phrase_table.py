@@ -0,0 +1,132 @@
+"""
+phrase_table.py:
+
+PhraseTable is an in-process index of the Phrase strings, keyed by
+phrase type. Every phrase has a dense ordinal within its type, so
+picking a phrase is a uniform randrange over the type's count followed
+by a keyed get of (type, ordinal). All the phrases of a decision are
+resolved together in one batch. Resolved phrases are kept in memcache
+and in the table itself for the life of the instance.
+
+Each table carries the generation stamp it was loaded at; /admin/loaddb
+bumps the stamp when it rewrites the Phrase table, which makes every
+instance reload on its next decision.
+
+* Author:       Mitchell Bowden <mitchellbowden AT gmail DOT com>
+* License:      MIT License: http://creativecommons.org/licenses/MIT/
+"""
+
+from google.appengine.api import memcache
+from google.appengine.ext import db
+import random
+import logging
+from models.phrase import Phrase, PhraseTableVersion, phrase_key_name
+
+GENERATION_KEY = 'phrase_table_generation'
+
+# the table for this instance, see get_phrase_table()
+_phrase_table = None
+
+class PhraseTable(object):
+  def __init__(self):
+    # the generation the counts were written at
+    self.generation = 0
+    # map of phrase type to number of phrases of that type
+    self.counts = {}
+    # map of phrase key name to phrase string
+    self.phrases = {}
+    self.load()
+
+  # the generation and the counts come from the same read, so a table
+  # never pairs the counts of one generation with the stamp of another
+  def load(self):
+    version = PhraseTableVersion.get_by_key_name(GENERATION_KEY)
+    if version is not None:
+      self.generation = version.generation
+      self.counts = dict(zip(version.types, version.counts))
+    logging.info('PhraseTable: loaded generation %d, %d types' % \
+        (self.generation, len(self.counts)))
+
+  # memcache keys for phrases are scoped to this generation
+  @property
+  def memcache_prefix(self):
+    return 'phrase:%d:' % self.generation
+
+  # pick a phrase ordinal uniformly from [0, count) for the given type
+  # return None if there are no phrases of that type
+  def random_ordinal(self, type_in):
+    cnt = self.counts.get(type_in, 0)
+    if cnt == 0:
+      return None
+    return random.randrange(cnt)
+
+  # resolve a list of (type, ordinal) slots to phrase strings in order
+  # the instance cache is checked first, then all misses go to memcache
+  # in one get_multi, and whatever is left to the datastore in one get
+  def get_phrases(self, slots):
+    key_names = [phrase_key_name(t, o) for t, o in slots if o is not None]
+    missing = [k for k in set(key_names) if k not in self.phrases]
+    if missing:
+      cached = memcache.get_multi(missing, key_prefix=self.memcache_prefix)
+      self.phrases.update(cached)
+      missing = [k for k in missing if k not in cached]
+    if missing:
+      fetched = {}
+      for k, p in zip(missing, Phrase.get_by_key_name(missing)):
+        if p is None:
+          fetched[k] = ''
+        else:
+          fetched[k] = p.str
+      memcache.set_multi(fetched, key_prefix=self.memcache_prefix)
+      self.phrases.update(fetched)
+    ret = []
+    for t, o in slots:
+      if o is None:
+        ret.append('')
+      else:
+        ret.append(self.phrases[phrase_key_name(t, o)])
+    return ret
+
+  # select a random phrase for each of the given types, in order
+  # a type without phrases resolves to ''
+  def random_phrases(self, types):
+    return self.get_phrases([(t, self.random_ordinal(t)) for t in types])
+
+# the generation the Phrase table was last written at
+# memcache holds the stamp, the datastore backs it up on eviction; the
+# stamp read back is only added, so it cannot replace a newer one that
+# bump_generation() set in the meantime
+def current_generation():
+  generation = memcache.get(GENERATION_KEY)
+  if generation is None:
+    version = PhraseTableVersion.get_by_key_name(GENERATION_KEY)
+    if version is None:
+      generation = 0
+    else:
+      generation = version.generation
+    memcache.add(GENERATION_KEY, generation)
+  return generation
+
+# called after the Phrase table is rewritten with the new per-type counts
+def bump_generation(counts):
+  def txn():
+    version = PhraseTableVersion.get_by_key_name(GENERATION_KEY)
+    if version is None:
+      version = PhraseTableVersion(key_name=GENERATION_KEY)
+    version.generation += 1
+    version.types = counts.keys()
+    version.counts = [counts[t] for t in version.types]
+    version.put()
+    return version.generation
+  generation = db.run_in_transaction(txn)
+  memcache.set(GENERATION_KEY, generation)
+  return generation
+
+# the phrase table for this instance, reloaded once the generation moves
+# past the one it was loaded at
+def get_phrase_table():
+  global _phrase_table
+  generation = current_generation()
+  if _phrase_table is None or _phrase_table.generation < generation:
+    _phrase_table = PhraseTable()
+  return _phrase_table
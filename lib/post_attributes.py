@@ -5,6 +5,10 @@ PostAttributes store selected information extracted from each post
 in buzz referee's comnsumption stream. For an input post, the 
 attributes are identified and stored by set(), retrieved by get().
 
+PostAttributes is a streaming accumulator: comments are passed in one
+at a time with feed(), from any iterator, and result() finalizes the
+attributes. Only per-actor counters are kept, never the comments.
+
 post attributes extracted:
   lc:       longest comment
   sc:       shortest comment
@@ -27,24 +31,113 @@ post attributes extracted:
 * License:      MIT License: http://creativecommons.org/licenses/MIT/
 """
 
-import types
-import re
 import logging
 import buzz 
 import utils.consts
+import lib.comment_normalizer
+
+# attributes that can name an actor, in match order;
+# each one is a bit in the per-actor match masks
+MATCH_ATTRIBUTES = (
+  'lc', 'sc', 'mc', 'fc', 'mw', 'fw', 'ml', 'fl',
+  'op', 'first', 'last', 'caller', 'creator'
+)
+MATCH_BITS = dict([(a, 1 << i) for i, a in enumerate(MATCH_ATTRIBUTES)])
+
+# attributes that only match if they are not shared
+# by more than this fraction of the commenters
+SUPPRESSED_ATTRIBUTES = ('fc', 'fl')
+SUPPRESSION_FRACTION = 0.40
+
+# the comment fields the attributes are computed from, comment pages
+# are decoded with only these
+COMMENT_FIELDS = ('content', 'object.content', 'actor.id', 'actor.name')
+
+# memo of mask -> list of attribute names
+_mask_names = {}
+
+def mask_to_attributes(mask):
+  if mask not in _mask_names:
+    _mask_names[mask] = [a for a in MATCH_ATTRIBUTES if mask & MATCH_BITS[a]]
+  return _mask_names[mask]
+
+class Extremum(object):
+  """
+  Running per-actor totals along with the actors holding the largest and
+  the smallest total. Totals only ever grow, so the max group is kept up
+  to date on every add; the min group only needs a rescan when its last
+  member grows out of it.
+  """
+  def __init__(self):
+    self.totals = {}
+    self.max_value = None
+    self.max_ids = set()
+    self.min_value = None
+    self.min_ids = set()
+
+  def add(self, actor_id, amount):
+    old = self.totals.get(actor_id)
+    if old is None:
+      new = amount
+    else:
+      new = old + amount
+    self.totals[actor_id] = new
+
+    if self.max_value is None or new > self.max_value:
+      self.max_value = new
+      self.max_ids = set([actor_id])
+    elif new == self.max_value:
+      self.max_ids.add(actor_id)
+
+    if old is not None and new != old and actor_id in self.min_ids:
+      self.min_ids.discard(actor_id)
+      if not self.min_ids:
+        self.rescan_min()
+      return
+    if self.min_value is None or new < self.min_value:
+      self.min_value = new
+      self.min_ids = set([actor_id])
+    elif new == self.min_value:
+      self.min_ids.add(actor_id)
+
+  def rescan_min(self):
+    self.min_value = min(self.totals.itervalues())
+    self.min_ids = set(
+      [a for a, v in self.totals.iteritems() if v == self.min_value]
+    )
 
 class PostAttributes(object):
   def __init__(self, post):
     self.attributes = {'lc':None, 'sc':None, 'mc':None, 'fc':None, 'mw':None, 'fw':None, 'ml':None, 'fl':None, 'op':None, 'first':None, 'last':None, 'caller':None, 'creator':utils.consts.BUZZREF_CREATOR_ID, 'num_times_ref_called':0, 'num_times_ref_replied':0, 'num_comments':0}
+    # running totals per actor for lc/sc, mc/fc, mw/fw, ml/fl
+    self.comment_sizes = Extremum()
+    self.number_of_comments = Extremum()
+    self.number_of_words = Extremum()
+    self.number_of_links = Extremum()
     # map of actors to # of comments
-    self.commenters = {}
+    self.commenters = self.number_of_comments.totals
+    # map of actors to their shared buzz.PersonIdentity
     self.commenters_o = {}
-    self.comment_sizes = {}
-    self.number_of_words = {}
-    self.number_of_links = {}
+    # map of actors to the bitmask of attributes they match
+    self.match_masks = None
     self.attributes['op'] = post.actor.id
     self.update_attributes(post)
     self.set('first', None)
+    # the original poster is the last commenter until a comment is fed
+    self.set('last', post.actor.id)
+    self.finalized = False
+
+  # accumulate a single comment
+  def feed(self, comment):
+    self.update_attributes(comment)
+    self.set('last', comment.actor.id)
+
+  # finalize the accumulated attributes, returns self
+  def result(self):
+    if not self.finalized:
+      self.finalize_attributes()
+      self.finalized = True
+    return self
 
   def to_str(self):
     ret_str = ''
@@ -69,33 +162,30 @@ class PostAttributes(object):
       self.attributes[key] = value
 
   def update_attributes(self, comment):
-    comment_content = comment.content.lower().strip().replace(u'\u2019', '\'')
-    comment_content = re.sub('<br />|\\r|\\n', ' ', comment_content)
+    # a post restored from a task snapshot carries its stats, not content
+    stats = getattr(comment, 'content_stats', None)
+    if stats is None:
+      stats = lib.comment_normalizer.comment_stats(comment.content)
+    comment_size, num_words, num_anchors, calls_ref = stats
     self.add_to_commenters(comment.actor)
     commenter_id = comment.actor.id
     self.set('num_comments', self.get('num_comments') + 1)
 
     # attribute extraction
-    comment_size = len(comment_content)
-    self.comment_sizes[commenter_id] = \
-      self.comment_sizes.get(commenter_id,0) + comment_size
-    num_comments = self.commenters[commenter_id]
-    num_words = len(comment_content.split())
-    self.number_of_words[commenter_id] = \
-      self.number_of_words.get(commenter_id,0) + num_words
+    self.comment_sizes.add(commenter_id, comment_size)
+    self.number_of_words.add(commenter_id, num_words)
     # every buzz comment has at least two links
     # one for the user profile, one for the comment permalink
-    num_links = comment_content.count('a href') - 2
+    num_links = num_anchors - 2
     if num_links > 0:
-      self.number_of_links[commenter_id] = \
-        self.number_of_links.get(commenter_id,0) + num_links
+      self.number_of_links.add(commenter_id, num_links)
 
     # first!!1!1
     if self.get('first') == None:
       self.set('first', commenter_id)
 
     # caller ...
-    if self.comment_calls_ref(comment_content):
+    if calls_ref:
       if self.get('caller') == None:
         self.set('caller', commenter_id)
       # num_times_ref_called ...
@@ -108,58 +198,46 @@ class PostAttributes(object):
   def finalize_attributes(self):
     # set most/least for:
     # lc/sc, mc/fc, mw/fw, ml/fl
-    comment_sizes_sorted = self.get_sorted_grouped(self.comment_sizes)
-    num_comments_sorted = self.get_sorted_grouped(self.commenters)
-    number_of_words_sorted = self.get_sorted_grouped(self.number_of_words)
-    number_of_links_sorted = self.get_sorted_grouped(self.number_of_links)
-
-    if len(comment_sizes_sorted) > 0:
-      self.set('lc', comment_sizes_sorted[-1][1])
-      self.set('sc', comment_sizes_sorted[0][1])
-    if len(num_comments_sorted) > 0:
-      self.set('mc', num_comments_sorted[-1][1])
-      self.set('fc', num_comments_sorted[0][1])
-    if len(number_of_words_sorted) > 0:
-      self.set('mw', number_of_words_sorted[-1][1])
-      self.set('fw', number_of_words_sorted[0][1])
-    if len(number_of_links_sorted) > 0:
-      self.set('ml', number_of_links_sorted[-1][1])
-      self.set('fl', number_of_links_sorted[0][1])
-
-  def get_sorted_grouped(self, d):
-    out = {}
-    for k in d:
-      out.setdefault(d[k], []).append(k)
-    return sorted(out.items())
-
-  # determine if the comment is @-mentioning buzzreferee
-  def comment_calls_ref(self, content):
-    if content.find('href="http://www.google.com/profiles/'+utils.consts.BUZZREFEREE_ID) != -1:
-      return True
-    if content.find('href="http://www.google.com/profiles/'+utils.consts.BUZZREFEREE_ID_STR) != -1:
-      return True
-    return False
+    for most, fewest, extremum in [
+        ('lc', 'sc', self.comment_sizes),
+        ('mc', 'fc', self.number_of_comments),
+        ('mw', 'fw', self.number_of_words),
+        ('ml', 'fl', self.number_of_links)]:
+      if extremum.totals:
+        self.set(most, list(extremum.max_ids))
+        self.set(fewest, list(extremum.min_ids))
+    self.build_match_masks()
+
+  # fold every actor-naming attribute into a per-actor bitmask,
+  # leaving out the fc/fl groups that are too common to mean anything
+  def build_match_masks(self):
+    masks = {}
+    for a in MATCH_ATTRIBUTES:
+      value = self.attributes[a]
+      if value is None:
+        continue
+      if isinstance(value, list):
+        if a in SUPPRESSED_ATTRIBUTES and \
+            len(value) > (len(self.commenters) * SUPPRESSION_FRACTION):
+          continue
+        ids = value
+      else:
+        ids = [value]
+      for actor_id in ids:
+        masks[actor_id] = masks.get(actor_id, 0) | MATCH_BITS[a]
+    self.match_masks = masks
 
   def add_to_commenters(self, actor):
-    if actor.id in self.commenters:
-      self.commenters[actor.id] = self.commenters[actor.id] + 1
-    else:
-      self.commenters[actor.id] = 1
-      self.commenters_o[actor.id] = actor
+    if actor.id not in self.commenters:
+      self.commenters_o[actor.id] = actor.identity
+    self.number_of_comments.add(actor.id, 1)
 
   def get_matches(self, winner_id):
-    matches = []
-    for a in self.attributes.keys():
-      if type(self.attributes[a]) is types.ListType:
-        logging.info('attribute: %s' % a)
-        logging.info(self.attributes[a])
-        if winner_id in self.attributes[a]:
-          if (a == 'fc' or a == 'fl') and \
-              len(self.attributes[a]) > (len(self.commenters) * 0.40):
-            continue
-          matches.append(a)
-      elif type(self.attributes[a]) is types.UnicodeType or \
-          type(self.attributes[a]) is types.StringType:
-        if self.attributes[a] == winner_id:
-          matches.append(a)
-    return matches
+    if self.match_masks is None:
+      self.build_match_masks()
+    matches = mask_to_attributes(self.match_masks.get(winner_id, 0))
+    if logging.getLogger().isEnabledFor(logging.DEBUG):
+      logging.debug('get_matches: %s matches %s' % (winner_id, matches))
+      for a in MATCH_ATTRIBUTES:
+        logging.debug('attribute: %s %s' % (a, self.attributes[a]))
+    return list(matches)
@@ -0,0 +1,76 @@
+"""
+post_snapshot.py:
+
+A compact, versioned snapshot of the fields of a consumption-feed post
+that the referee needs, passed in the /ref task so the worker does not
+fetch the post again.
+
+A snapshot is a JSON list:
+  [version, taken, actor_id, actor_name, content_stats]
+where taken is the unix time it was made and content_stats is the
+comment_normalizer.comment_stats() of the post content. The comment
+count and updated value travel in their own task params. A snapshot of
+another version, or older than MAX_AGE, is not used and the post is
+fetched as before.
+
+* Author:       Mitchell Bowden <mitchellbowden AT gmail DOT com>
+* License:      MIT License: http://creativecommons.org/licenses/MIT/
+"""
+
+import time
+import logging
+import buzz
+import lib.comment_normalizer
+
+SNAPSHOT_VERSION = 1
+
+# seconds a snapshot is trusted, past this the post is fetched again
+MAX_AGE = 15 * 60
+
+# stands in for a buzz.Post restored from a snapshot
+class PostSnapshot(object):
+  def __init__(self, client, post_id, actor, comment_count, updated,
+               content_stats):
+    self.client = client
+    self.id = post_id
+    self.actor = actor
+    self.comment_count = comment_count
+    self.updated = updated
+    self.content = None
+    self.content_stats = content_stats
+    self.placeholder = None
+
+  def comments(self, fields=None):
+    return self.client.comments(
+      post_id=self.id, actor_id=self.actor.id, fields=fields
+    )
+
+def snapshot(post, now=None):
+  if now is None:
+    now = time.time()
+  stats = lib.comment_normalizer.comment_stats(post.content or '')
+  return buzz.simplejson.dumps([
+    SNAPSHOT_VERSION, int(now), post.actor.id, post.actor.name, list(stats)
+  ])
+
+# the PostSnapshot for a task's snapshot param,
+# None if it is missing, stale or of another version
+def restore(client, post_id, value, comment_count, updated, now=None):
+  if not value or not comment_count:
+    return None
+  if now is None:
+    now = time.time()
+  try:
+    fields = buzz.simplejson.loads(value)
+    if fields[0] != SNAPSHOT_VERSION:
+      return None
+    version, taken, actor_id, actor_name, stats = fields
+  except (ValueError, TypeError, IndexError):
+    logging.warning('post_snapshot: bad snapshot for ' + post_id)
+    return None
+  if now - taken > MAX_AGE:
+    return None
+  actor = buzz.Person({'id': actor_id, 'name': actor_name}, client=client)
+  return PostSnapshot(
+    client, post_id, actor, int(comment_count), updated or None, tuple(stats)
+  )
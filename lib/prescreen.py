@@ -0,0 +1,99 @@
+"""
+prescreen.py:
+
+Cheap checks that rule out posts which cannot contain a call for the
+referee, run before the full PostAttributes pipeline. Most posts never
+call the referee, so most posts stop here.
+
+stages:
+  payload:     the post itself - its content, the summaries on its reply
+               links and its comment count; needs no extra fetch
+  first_page:  the first page of comments, which rules the post out when
+               it holds every comment of the post
+
+A post that cannot be ruled out is a candidate. Counters of how many
+posts were rejected at each stage and passed on as candidates are kept
+per instance. The payload stage also runs on the consumption feed, so a
+post rejected there is never queued.
+
+* Author:       Mitchell Bowden <mitchellbowden AT gmail DOT com>
+* License:      MIT License: http://creativecommons.org/licenses/MIT/
+"""
+
+import lib.comment_normalizer
+import lib.post_attributes
+
+STAGES = ('payload', 'first_page')
+
+# per-instance counters
+counters = {'candidates': 0}
+for stage in STAGES:
+  counters['rejected_' + stage] = 0
+
+def counters_str():
+  return ', '.join([
+    '%s: %d' % (k, counters[k]) for k in
+    ['rejected_' + s for s in STAGES] + ['candidates']
+  ])
+
+def _calls_ref(content):
+  return content is not None and lib.comment_normalizer.calls_ref(content)
+
+# True if the post payload calls the referee, False if it rules the post
+# out, None if the comments have to be looked at
+def screen_payload(post):
+  stats = getattr(post, 'content_stats', None)
+  if stats is not None:
+    # a post restored from a task snapshot, without content or links
+    return stats[3] or None
+  if _calls_ref(post.content):
+    return True
+  replies = getattr(post, 'replies', None)
+  if not replies:
+    # no replies link, so no comment count to trust
+    return None
+  for link in replies:
+    if _calls_ref(link.summary):
+      return True
+  if post.comment_count == 0:
+    return False
+  return None
+
+# True if the first page of comments calls the referee, False if it
+# holds every comment and none of them do, None otherwise
+def screen_first_page(comments):
+  page = comments.data
+  for comment in page:
+    if _calls_ref(comment.content):
+      return True
+  if comments.next_uri:
+    return None
+  return False
+
+def _reject(stage):
+  counters['rejected_' + stage] += 1
+  return False
+
+# the posts of a feed page that the payload stage cannot rule out
+def payload_candidates(posts):
+  ret = []
+  for post in posts:
+    if screen_payload(post) is False:
+      _reject('payload')
+    else:
+      ret.append(post)
+  return ret
+
+# screen a post, returns (is_candidate, comments) where comments is the
+# comments Result if its first page was loaded, for reuse by the referee
+def screen(post):
+  comments = None
+  ret = screen_payload(post)
+  if ret is False:
+    return (_reject('payload'), comments)
+  if ret is None:
+    comments = post.comments(fields=lib.post_attributes.COMMENT_FIELDS)
+    if screen_first_page(comments) is False:
+      return (_reject('first_page'), comments)
+  counters['candidates'] += 1
+  return (True, comments)
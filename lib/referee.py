@@ -12,33 +12,35 @@ from google.appengine.ext import db
 import random
 import logging
 import lib.post_attributes
+import lib.phrase_table
 import utils.consts
-from models.phrase import Phrase
-from models.decision_cache import DecisionCache
 
 class Referee(object):
-  def __init__(self, post):
+  # comments is the post's comments Result, if it was already fetched
+  def __init__(self, post, comments=None):
     self.post = post
+    self.comments = comments
     self.winner = None
 
+  @property
+  def phrase_table(self):
+    if not hasattr(self, '_phrase_table') or not self._phrase_table:
+      self._phrase_table = lib.phrase_table.get_phrase_table()
+    return self._phrase_table
+
   @property
   def referee_decision(self):
     if not hasattr(self, '_ref_decision') or not self._ref_decision:
       attributes = lib.post_attributes.PostAttributes(self.post)
 
-      comments = self.post.comments()
-      
-      comments_list = []
-      for comment in comments:
-        attributes.update_attributes(comment)
-        comments_list.append(comment)
-
-      if len(comments_list) > 0:
-        attributes.set('last', comments_list[-1].actor.id)
-      else:
-        attributes.set('last', self.post.actor.id)
-
-      attributes.finalize_attributes()
+      if self.comments is None:
+        self.comments = self.post.comments(
+          fields=lib.post_attributes.COMMENT_FIELDS
+        )
+      # later pages load while the current one is scored
+      for comment in self.comments.prefetch():
+        attributes.feed(comment)
+      attributes.result()
 
       winner_id = random.choice(attributes.commenters.keys())
       self.winner = attributes.commenters_o[winner_id]
@@ -46,21 +48,45 @@ class Referee(object):
       self._ref_decision = self.build_referee_decision(attributes)
       if self._ref_decision == '' or self._ref_decision == None:
         self._ref_decision = None
-        # cache this post as already decided on
-        pid = str(self.post.id[25:])
-        if DecisionCache.get_by_key_name(pid) is None:
-          new_decision = DecisionCache(key_name=pid)
-          new_decision.put()
     return self._ref_decision
 
   # construct the final decision string
   # return None if nothing should be posted in reply
   def build_referee_decision(self, attributes):
+    slots = self.decision_template(attributes)
+    if slots is None:
+      return None
+
+    # every phrase of the decision is resolved in one batch
+    phrases = self.get_random_phrases(slots)
+
+    # single phrase decisions
+    if len(phrases) == 1:
+      return phrases[0]
+
+    # build the decision string
+    # the phrase components are made to look best
+    # in a certain pattern:
+    # {intro} {winner_name} {has_won} {begin_reason} {adj} {reason} {end}
+    intro, haswon, begin, adj, reason = phrases
+    return "%(intro)s %(name)s %(haswon)s %(begin)s%(dt)s %(adj)s%(reason)s." % {
+      'intro': intro,
+      'name': '*'+self.winner.name+'*',
+      'haswon': haswon,
+      'begin': begin,
+      'dt': self.get_DT(begin, adj),
+      'adj': adj,
+      'reason': reason
+    }
+
+  # decide which phrase types (slots) make up the decision, in order
+  # return None if nothing should be posted in reply
+  def decision_template(self, attributes):
     # some ordering here...
 
     # check for num_times_ref_called
     if attributes.get('num_times_ref_replied') == 1 and attributes.get('num_times_ref_called') > 1:
-      return self.get_random_phrase('already_called')
+      return ['already_called']
     elif attributes.get('num_times_ref_replied') >= 2:
       logging.info('build_referee_decision: Returning None because num_times_ref_replied >= 2')
       return None
@@ -70,16 +96,16 @@ class Referee(object):
     
     # check if original poster is caller and there are no other comments
     if len(attributes.commenters.keys()) == 1:
-      return self.get_random_phrase('op_sole_poster')
+      return ['op_sole_poster']
 
     if self.winner.id == utils.consts.BUZZREFEREE_ID:
-      return self.get_random_phrase('buzzref_wins')
+      return ['buzzref_wins']
 
     matching_attribs = attributes.get_matches(self.winner.id)
 
     # even if there are no matching attributes, don't self-doubt!
     if len(matching_attribs) == 0:
-      return self.get_random_phrase('no_reason')
+      return ['no_reason']
 
     # in the case of multiple matching attributes, 
     # select one at random
@@ -87,41 +113,20 @@ class Referee(object):
 
     # the winner called the referee
     if winning_reason == 'caller':
-      return self.get_random_phrase('caller')
+      return ['caller']
 
     # the winner wrote this comment 
     if winning_reason == 'creator':
-      return self.get_random_phrase('creator')
+      return ['creator']
 
-    # build the decision string
-    # the phrase components are made to look best
-    # in a certain pattern:
-    # {intro} {winner_name} {has_won} {begin_reason} {adj} {reason} {end}
-    begin = self.get_random_phrase('begin')
-    adj = self.get_random_phrase('adj_pos')
-    return "%(intro)s %(name)s %(haswon)s %(begin)s%(dt)s %(adj)s%(reason)s." % {
-      'intro': self.get_random_phrase('intro'),
-      'name': '*'+self.winner.name+'*',
-      'haswon': self.get_random_phrase('has_won'),
-      'begin': begin,
-      'dt': self.get_DT(begin, adj),
-      'adj': adj,
-      'reason': self.get_random_phrase(winning_reason)
-    }
+    return ['intro', 'has_won', 'begin', 'adj_pos', winning_reason]
 
-  # select a random phrase from the given type
-  def get_random_phrase(self, type_in):
-    random.seed()
-    phrases = Phrase.all()
-    cnt = phrases.filter('type =',type_in).count(1000)
-    if cnt == 0:
-      return ''
-    if cnt == 1:
-      r = 1
-    else:
-      r = random.randrange(1, cnt, 1)
-    phrase = phrases.filter('type =',type_in).fetch(limit = 1, offset = r-1)[0]
-    return phrase.str.replace(utils.consts.NAME_PLACEHOLDER, '*'+self.winner.name+'*').replace('  ', ' ')
+  # select a random phrase for each of the given types
+  def get_random_phrases(self, types_in):
+    return [
+      phrase.replace(utils.consts.NAME_PLACEHOLDER, '*'+self.winner.name+'*').replace('  ', ' ')
+      for phrase in self.phrase_table.random_phrases(types_in)
+    ]
 
   # given that the previous 'begin' phrase may end with a determiner,
   # make sure the DT agrees with the next adjective
@@ -0,0 +1,93 @@
+"""
+task_batch.py:
+
+Batched taskqueue enqueueing. Tasks are added with Queue.add() in chunks
+of the service maximum instead of one RPC per task. Chunks that fail
+with a transient error are retried with exponential backoff; tasks whose
+names were already used (existing or tombstoned, or repeated within the
+call) are counted as duplicates and not retried.
+
+* Author:       Mitchell Bowden <mitchellbowden AT gmail DOT com>
+* License:      MIT License: http://creativecommons.org/licenses/MIT/
+"""
+
+from google.appengine.api.labs import taskqueue
+import time
+import logging
+
+# the most tasks the taskqueue service accepts in one add
+MAX_TASKS_PER_ADD = 100
+
+MAX_RETRIES = 3
+# seconds before the first retry, doubled on each further retry
+RETRY_BACKOFF = 0.2
+
+_DUPLICATE_ERRORS = (
+  taskqueue.TaskAlreadyExistsError, taskqueue.TombstonedTaskError
+)
+# errors that retrying the same chunk cannot fix
+_CHUNK_ERRORS = _DUPLICATE_ERRORS + (taskqueue.DuplicateTaskNameError,)
+
+def _was_enqueued(task):
+  return getattr(task, 'was_enqueued', False)
+
+# add the tasks to the queue, returns a dict of counts:
+#   added:      tasks now in the queue
+#   duplicate:  tasks whose name already exists, is tombstoned or is
+#               repeated in tasks
+#   failed:     tasks that could not be added after all retries
+def add_tasks(tasks, queue_name='default',
+              max_retries=MAX_RETRIES, backoff=RETRY_BACKOFF):
+  stats = {'added': 0, 'duplicate': 0, 'failed': 0}
+  # a batch with the same name twice fails as a whole, keep the first
+  unique = []
+  names = set()
+  for task in tasks:
+    if task.name:
+      if task.name in names:
+        stats['duplicate'] += 1
+        continue
+      names.add(task.name)
+    unique.append(task)
+  tasks = unique
+  queue = taskqueue.Queue(queue_name)
+  for i in xrange(0, len(tasks), MAX_TASKS_PER_ADD):
+    _add_chunk(queue, tasks[i:i+MAX_TASKS_PER_ADD], stats, max_retries, backoff)
+  logging.info('add_tasks: %(added)d added, %(duplicate)d duplicate, ' \
+      '%(failed)d failed' % stats)
+  return stats
+
+def _add_chunk(queue, chunk, stats, max_retries, backoff):
+  attempt = 0
+  while chunk:
+    try:
+      queue.add(chunk)
+      stats['added'] += len(chunk)
+      return
+    except _CHUNK_ERRORS:
+      # the batch only reports its first error,
+      # so sort out the rest of the chunk one task at a time
+      for task in chunk:
+        if _was_enqueued(task):
+          stats['added'] += 1
+          continue
+        try:
+          queue.add(task)
+          stats['added'] += 1
+        except _DUPLICATE_ERRORS:
+          stats['duplicate'] += 1
+        except taskqueue.Error:
+          stats['failed'] += 1
+      return
+    except taskqueue.Error, e:
+      # keep whatever made it in, retry the rest
+      remaining = [task for task in chunk if not _was_enqueued(task)]
+      stats['added'] += len(chunk) - len(remaining)
+      chunk = remaining
+      if attempt >= max_retries:
+        logging.warning('add_tasks: giving up on %d tasks: %s' % \
+            (len(chunk), e.__class__.__name__))
+        stats['failed'] += len(chunk)
+        return
+      time.sleep(backoff * (2 ** attempt))
+      attempt += 1
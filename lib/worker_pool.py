@@ -0,0 +1,50 @@
+"""
+worker_pool.py:
+
+Runs a function over a list of items on a bounded number of worker
+threads and returns the results in the order of the items. Each item
+gets either its result or the formatted traceback of the exception it
+raised, so one failing item does not stop the others.
+
+Where threads cannot be started (buzz.THREADS_AVAILABLE is false) the
+items are run one after the other, which is the same as a plain loop.
+
+* Author:       Mitchell Bowden <mitchellbowden AT gmail DOT com>
+* License:      MIT License: http://creativecommons.org/licenses/MIT/
+"""
+
+import traceback
+from buzz import threading, THREADS_AVAILABLE
+
+# returns a list of (result, error) pairs, one per item, in order,
+# error is None or the traceback of the exception func raised
+def map_bounded(func, items, workers):
+  results = [None] * len(items)
+  queue = list(enumerate(items))
+  queue.reverse()
+  lock = threading.Lock()
+
+  def work():
+    while True:
+      lock.acquire()
+      try:
+        if not queue:
+          return
+        i, item = queue.pop()
+      finally:
+        lock.release()
+      try:
+        results[i] = (func(item), None)
+      except:
+        results[i] = (None, traceback.format_exc())
+
+  workers = min(workers, len(items))
+  if workers <= 1 or not THREADS_AVAILABLE:
+    work()
+    return results
+  threads = [threading.Thread(target=work) for i in xrange(workers)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  return results
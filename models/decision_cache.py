@@ -1,14 +1,274 @@
 """
-decision_cache.py: 
+decision_cache.py:
 
 DecisionCache is a db.Model object for caching a referee decision
 
+A post is decided once it has a DecisionCache entity. DecidedSet answers
+"has this post been decided on" from three tiers:
+  * an in-instance Bloom filter of every decided post, persisted as
+    FILTER_SHARDS DecidedFilter entities and rehydrated when the
+    generation counter in memcache moves; a negative answer from it
+    costs no RPC
+  * "already decided" bits in memcache, confirming Bloom positives
+  * the DecisionCache entities, the source of truth
+mark_decided() writes through all three, the filter first: a decision
+is only stored once the filter covers it, so a Bloom negative is always
+undecided, while a filter bit whose decision failed to store is only a
+false positive that gets confirmed away.
+
+Each shard is its own entity group, so concurrent decisions rarely
+contend on one filter. A shard only ever gains bits: once its current
+layer holds what it was sized for, the layer is kept as it is and new
+key names go into a fresh layer twice its size, and a key name is in
+the shard if any layer has it.
+
+Decisions stored before the filter existed are added by backfill_filter()
+in a task. Until it has run to the end every shard is incomplete and
+answers nothing, so every post is confirmed against memcache and the
+datastore.
+
 * Author:       Mitchell Bowden <mitchellbowden AT gmail DOT com>
 * License:      MIT License: http://creativecommons.org/licenses/MIT/
 """
 
 from google.appengine.ext import db
+from google.appengine.api import memcache
+from google.appengine.api.labs import taskqueue
+import logging
+import time
+import zlib
+from lib.bloom_filter import BloomFilter, BITS_PER_MEMBER, bits_log2_for
+
+DECIDED_PREFIX = 'decided:'
+FILTER_KEY_PREFIX = 'decided_filter:'
+FILTER_GENERATION_KEY = 'decided_filter_generation'
+FILTER_BACKFILL_KEY = 'decided_filter_backfill'
+
+FILTER_SHARDS = 16
+# decisions the first layer of the filter shards is sized for
+EXPECTED_DECISIONS = 100000
+
+# the task that adds the decisions stored before the filter existed
+BACKFILL_URL = '/admin/decided_filter'
+# seconds a backfill task scans before it hands over to the next one
+BACKFILL_DEADLINE = 20
+# seconds before an incomplete filter queues another backfill
+BACKFILL_RETRY = 3600
+
+# maximum number of keys in one datastore batch get
+BATCH_SIZE = 1000
 
 class DecisionCache(db.Model):
   winner_id = db.StringProperty()
   date = db.DateTimeProperty(auto_now_add=True)
+
+# one shard of the persisted Bloom filter of all DecisionCache key names
+class DecidedFilter(db.Model):
+  # the layer new key names go into, and the key names in it
+  bits = db.BlobProperty()
+  count = db.IntegerProperty(default=0)
+  # the full layers, each twice the size of the one before
+  layers = db.ListProperty(db.Blob)
+  generation = db.IntegerProperty(default=0)
+  # whether the backfill has added the decisions from before the filter
+  complete = db.BooleanProperty(default=False)
+
+  # the layers as BloomFilters, the current one last
+  def blooms(self):
+    return [BloomFilter(bits) for bits in self.layers] + \
+        [BloomFilter(self.bits, _shard_bits_log2())]
+
+  # add key names to the current layer, starting a new one when it is full
+  def add(self, names):
+    bloom = BloomFilter(self.bits, _shard_bits_log2())
+    if self.count + len(names) > bloom.num_bits / BITS_PER_MEMBER:
+      if self.count:
+        self.layers.append(db.Blob(bloom.to_string()))
+      bloom = BloomFilter(num_bits_log2=bits_log2_for(
+        max(2 * bloom.num_bits / BITS_PER_MEMBER, len(names))
+      ))
+      self.count = 0
+    for name in names:
+      bloom.add(name)
+    self.bits = db.Blob(bloom.to_string())
+    self.count += len(names)
+    self.generation += 1
+
+# the DecisionCache key name for a buzz post id,
+# the post id without its 'tag:google.com,2010:buzz:' prefix
+def decision_key_name(post_id):
+  return str(post_id[25:])
+
+# the filter shard a DecisionCache key name belongs to
+def filter_shard(key_name):
+  return (zlib.crc32(key_name) & 0xffffffff) % FILTER_SHARDS
+
+def _filter_key_names():
+  return [FILTER_KEY_PREFIX + str(shard) for shard in xrange(FILTER_SHARDS)]
+
+def _shard_bits_log2():
+  return bits_log2_for(EXPECTED_DECISIONS / FILTER_SHARDS)
+
+# have other instances reload the filter shards on their next refresh
+def _bump_generation():
+  if memcache.incr(FILTER_GENERATION_KEY) is None:
+    memcache.delete(FILTER_GENERATION_KEY)
+
+# add key names to their filter shards, one transaction per shard touched,
+# returns the shards written, by shard number
+def _add_to_shards(key_names, complete=None):
+  by_shard = {}
+  for key_name in key_names:
+    by_shard.setdefault(filter_shard(key_name), []).append(key_name)
+
+  def txn(shard, names):
+    key_name = FILTER_KEY_PREFIX + str(shard)
+    decided_filter = DecidedFilter.get_by_key_name(key_name)
+    if decided_filter is None:
+      decided_filter = DecidedFilter(key_name=key_name)
+    if names:
+      decided_filter.add(names)
+    if complete is not None:
+      decided_filter.complete = complete
+      decided_filter.generation += 1
+    decided_filter.put()
+    return decided_filter
+
+  if complete is not None:
+    for shard in xrange(FILTER_SHARDS):
+      by_shard.setdefault(shard, [])
+  written = {}
+  for shard, names in by_shard.iteritems():
+    written[shard] = db.run_in_transaction(txn, shard, names)
+  _bump_generation()
+  return written
+
+# queue the backfill, at most once every BACKFILL_RETRY seconds
+def _start_backfill():
+  if memcache.add(FILTER_BACKFILL_KEY, True, time=BACKFILL_RETRY):
+    logging.info('DecidedSet: filter incomplete, queueing its backfill')
+    taskqueue.Task(url=BACKFILL_URL).add()
+
+# add the DecisionCache key names after the given key to the filter, in
+# key order, for up to deadline seconds
+# returns the key to carry on after, or None once the filter is complete
+def backfill_filter(after=None, deadline=BACKFILL_DEADLINE):
+  started = time.time()
+  while True:
+    query = DecisionCache.all(keys_only=True).order('__key__')
+    if after:
+      query.filter('__key__ >', db.Key(after))
+    keys = query.fetch(BATCH_SIZE)
+    if not keys:
+      _add_to_shards([], complete=True)
+      logging.info('DecidedSet: filter backfill complete')
+      return None
+    _add_to_shards([key.name() for key in keys])
+    after = str(keys[-1])
+    if time.time() - started > deadline:
+      return after
+
+class DecidedSet(object):
+  def __init__(self):
+    # shard -> [BloomFilter], and the generation they were loaded at
+    self.blooms = {}
+    self.generations = {}
+    # the memcache generation counter when the shards were last loaded
+    self.generation = None
+
+  # rehydrate the Bloom filter shards that another instance has written to
+  def refresh(self):
+    generation = memcache.get(FILTER_GENERATION_KEY)
+    if generation is not None and generation == self.generation:
+      return
+    if generation is None:
+      # start the counter before reading the shards, so a write that
+      # lands after the read moves it; a restarted counter starts at the
+      # time in microseconds, above any value it had before
+      memcache.add(FILTER_GENERATION_KEY, int(time.time() * 1000000))
+      generation = memcache.get(FILTER_GENERATION_KEY)
+    filters = DecidedFilter.get_by_key_name(_filter_key_names())
+    self.load(dict(enumerate(filters)))
+    self.generation = generation
+    if [f for f in filters if f is None or not f.complete]:
+      _start_backfill()
+
+  # take the shards that have changed since they were loaded, an
+  # incomplete shard is dropped
+  def load(self, filters):
+    for shard, decided_filter in filters.iteritems():
+      if decided_filter is None or not decided_filter.complete:
+        self.blooms.pop(shard, None)
+        self.generations.pop(shard, None)
+      elif self.generations.get(shard) != decided_filter.generation:
+        self.blooms[shard] = decided_filter.blooms()
+        self.generations[shard] = decided_filter.generation
+
+  # return the set of the given post ids that have not been decided on
+  def undecided(self, post_ids):
+    self.refresh()
+    post_ids_by_key_name = {}
+    for post_id in post_ids:
+      post_ids_by_key_name[decision_key_name(post_id)] = post_id
+
+    # Bloom negatives are undecided, only positives need confirming;
+    # without a complete shard a key is confirmed too
+    candidates = []
+    for k in post_ids_by_key_name:
+      blooms = self.blooms.get(filter_shard(k))
+      if blooms is None or [b for b in blooms if b.might_contain(k)]:
+        candidates.append(k)
+    decided = {}
+    if candidates:
+      decided = memcache.get_multi(candidates, key_prefix=DECIDED_PREFIX)
+    missing = [k for k in candidates if k not in decided]
+
+    found = {}
+    for i in xrange(0, len(missing), BATCH_SIZE):
+      chunk = missing[i:i+BATCH_SIZE]
+      for key_name, decision in zip(chunk, DecisionCache.get_by_key_name(chunk)):
+        if decision is not None:
+          found[key_name] = True
+    if found:
+      memcache.set_multi(found, key_prefix=DECIDED_PREFIX)
+      decided.update(found)
+
+    return set([
+      post_id for key_name, post_id in post_ids_by_key_name.iteritems()
+      if key_name not in decided
+    ])
+
+  # cache the given post as decided on, with the winner if there was one
+  def mark(self, post_id, winner_id=None):
+    self.mark_many([(post_id, winner_id)])
+
+  # cache a list of (post_id, winner_id) pairs as decided on, in one
+  # datastore put and one filter transaction per shard touched
+  def mark_many(self, decisions):
+    undecided = self.undecided([post_id for post_id, winner_id in decisions])
+    new_decisions = []
+    for post_id, winner_id in decisions:
+      if post_id not in undecided:
+        continue
+      new_decision = DecisionCache(key_name=decision_key_name(post_id))
+      if winner_id is not None:
+        new_decision.winner_id = str(winner_id)
+      new_decisions.append(new_decision)
+    if not new_decisions:
+      return
+    key_names = [d.key().name() for d in new_decisions]
+    # the filter first, so it covers every stored decision
+    self.load(_add_to_shards(key_names))
+    db.put(new_decisions)
+    memcache.set_multi(
+      dict([(k, True) for k in key_names]), key_prefix=DECIDED_PREFIX
+    )
+
+# the decided set for this instance
+_decided_set = DecidedSet()
+
+def undecided_post_ids(post_ids):
+  return _decided_set.undecided(post_ids)
+
+def mark_decided(post_id, winner_id=None):
+  _decided_set.mark(post_id, winner_id)
@@ -18,6 +18,19 @@ phrase_types = [
   "op", "first", "last", "no_reason"
   ]
 
+# phrases are stored under a key name built from their type and
+# their dense, 0-based position within that type
+def phrase_key_name(type, ordinal):
+  return '%s:%d' % (type, ordinal)
+
 class Phrase(db.Model):
   str = db.StringProperty(required=True)
   type = db.StringProperty(required=True, choices=set(phrase_types))
+  ordinal = db.IntegerProperty()
+
+# generation stamp of the Phrase table, bumped on every reload,
+# along with the number of phrases of each type: types[i] has counts[i]
+class PhraseTableVersion(db.Model):
+  generation = db.IntegerProperty(default=0)
+  types = db.StringListProperty()
+  counts = db.ListProperty(int)
@@ -0,0 +1,86 @@
+"""
+post_evaluation.py: 
+
+PostEvaluation is a db.Model object recording the comment_count and
+updated values of a post the last time the referee evaluated it and had
+nothing to say. Until either value moves, no new call for the referee
+can have appeared on the post, so it does not need to be fetched again.
+
+Evaluations are also kept in memcache, along with "never evaluated"
+markers, so that checking a page of posts is one memcache get_multi
+plus batched datastore gets for the misses.
+
+* Author:       Mitchell Bowden <mitchellbowden AT gmail DOT com>
+* License:      MIT License: http://creativecommons.org/licenses/MIT/
+"""
+
+from google.appengine.ext import db
+from google.appengine.api import memcache
+from models.decision_cache import decision_key_name, BATCH_SIZE
+
+EVALUATED_PREFIX = 'evaluated:'
+
+# memcache value for posts without an evaluation
+NOT_EVALUATED = ()
+
+class PostEvaluation(db.Model):
+  comment_count = db.IntegerProperty()
+  updated = db.StringProperty()
+  date = db.DateTimeProperty(auto_now=True)
+
+# map of key name to the (comment_count, updated) last evaluated,
+# or NOT_EVALUATED
+def _evaluations(key_names):
+  evaluations = memcache.get_multi(key_names, key_prefix=EVALUATED_PREFIX)
+  missing = [k for k in key_names if k not in evaluations]
+  fetched = {}
+  for i in xrange(0, len(missing), BATCH_SIZE):
+    chunk = missing[i:i+BATCH_SIZE]
+    for key_name, evaluation in zip(chunk, PostEvaluation.get_by_key_name(chunk)):
+      if evaluation is None:
+        fetched[key_name] = NOT_EVALUATED
+      else:
+        fetched[key_name] = (evaluation.comment_count, evaluation.updated)
+  if fetched:
+    memcache.set_multi(fetched, key_prefix=EVALUATED_PREFIX)
+    evaluations.update(fetched)
+  return evaluations
+
+# return the posts whose comment_count or updated moved since their last
+# evaluation, in order
+def changed_posts(posts):
+  evaluations = _evaluations([decision_key_name(post.id) for post in posts])
+  return [
+    post for post in posts
+    if evaluations[decision_key_name(post.id)] != \
+        (post.comment_count, post.updated)
+  ]
+
+# return the post ids in versions, a map of post id to the
+# (comment_count, updated) it was queued with, that were last evaluated
+# at those values
+def unchanged_post_ids(versions):
+  key_names = dict([
+    (post_id, decision_key_name(post_id)) for post_id in versions
+  ])
+  evaluations = _evaluations(key_names.values())
+  return set([
+    post_id for post_id, version in versions.iteritems()
+    if evaluations[key_names[post_id]] == version
+  ])
+
+# record a list of posts as evaluated in one datastore put
+def record_evaluations(posts):
+  if not posts:
+    return
+  evaluations = []
+  cached = {}
+  for post in posts:
+    key_name = decision_key_name(post.id)
+    evaluation = PostEvaluation(key_name=key_name)
+    evaluation.comment_count = post.comment_count
+    evaluation.updated = post.updated
+    evaluations.append(evaluation)
+    cached[key_name] = (post.comment_count, post.updated)
+  db.put(evaluations)
+  memcache.set_multi(cached, key_prefix=EVALUATED_PREFIX)
@@ -0,0 +1,84 @@
+"""
+stream_state.py:
+
+StreamState is a db.Model object for the paging state of a buzz stream
+that is read across several cron ticks, keyed by stream name.
+
+Streams are read newest-updated first. Besides the resume cursor, the
+state keeps a high-water mark: the largest 'updated' value seen by the
+last completed scan and the post ids at that value. An incremental scan
+stops once it reaches posts at or below the mark, so its cost follows
+new activity rather than the size of the stream. Every
+FULL_SCAN_INTERVAL a full scan ignores the mark to catch anything an
+incremental scan missed.
+
+* Author:       Mitchell Bowden <mitchellbowden AT gmail DOT com>
+* License:      MIT License: http://creativecommons.org/licenses/MIT/
+"""
+
+from google.appengine.ext import db
+import datetime
+
+CONSUMPTION_STREAM = 'consumption'
+
+FULL_SCAN_INTERVAL = datetime.timedelta(hours=6)
+
+class StreamState(db.Model):
+  # uri of the next page to read, set when a tick ran out of time
+  next_uri = db.TextProperty()
+  date = db.DateTimeProperty(auto_now=True)
+
+  # high-water mark of the last completed scan
+  high_water = db.StringProperty()
+  high_water_ids = db.StringListProperty()
+
+  # the scan in progress: full or incremental, and its largest 'updated'
+  full_scan = db.BooleanProperty(default=False)
+  scan_high_water = db.StringProperty()
+  scan_high_water_ids = db.StringListProperty()
+  last_full_scan = db.DateTimeProperty()
+
+  # start a new scan unless one is being resumed
+  def start_scan(self, now):
+    if self.next_uri:
+      return
+    self.full_scan = self.last_full_scan is None or \
+      now - self.last_full_scan > FULL_SCAN_INTERVAL
+    self.scan_high_water = None
+    self.scan_high_water_ids = []
+
+  # whether the post was already covered by the last completed scan
+  def seen(self, post):
+    if self.full_scan or not self.high_water or not post.updated:
+      return False
+    if post.updated < self.high_water:
+      return True
+    return post.updated == self.high_water and \
+      post.id in self.high_water_ids
+
+  # track the largest 'updated' value of the scan in progress
+  def observe(self, post):
+    if not post.updated:
+      return
+    if not self.scan_high_water or post.updated > self.scan_high_water:
+      self.scan_high_water = post.updated
+      self.scan_high_water_ids = [post.id]
+    elif post.updated == self.scan_high_water and \
+        post.id not in self.scan_high_water_ids:
+      self.scan_high_water_ids.append(post.id)
+
+  # the scan reached the end of the stream or the high-water mark
+  def finish_scan(self, now):
+    if self.scan_high_water:
+      if not self.high_water or self.scan_high_water > self.high_water:
+        self.high_water = self.scan_high_water
+        self.high_water_ids = self.scan_high_water_ids
+      elif self.scan_high_water == self.high_water:
+        for post_id in self.scan_high_water_ids:
+          if post_id not in self.high_water_ids:
+            self.high_water_ids.append(post_id)
+    if self.full_scan:
+      self.last_full_scan = now
+    self.next_uri = None
+    self.scan_high_water = None
+    self.scan_high_water_ids = []
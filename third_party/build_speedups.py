@@ -0,0 +1,42 @@
+"""
+build_speedups.py:
+
+Builds the C speedups of the bundled simplejson in place:
+
+  python third_party/build_speedups.py
+
+buzz.py then decodes with them, ahead of the standard library json
+module, unless the json_backend config names another backend. App Engine does not load C extensions, so
+there simplejson stays pure Python; this is for running the client
+elsewhere.
+
+* Author:       Mitchell Bowden <mitchellbowden AT gmail DOT com>
+* License:      MIT License: http://creativecommons.org/licenses/MIT/
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+from distutils.core import setup, Extension
+
+def build():
+  here = os.path.dirname(os.path.abspath(__file__))
+  build_temp = tempfile.mkdtemp()
+  cwd = os.getcwd()
+  os.chdir(here)
+  try:
+    setup(
+      name='simplejson-speedups',
+      script_args=['build_ext', '--inplace', '--build-temp', build_temp] + \
+        sys.argv[1:],
+      ext_modules=[
+        Extension('simplejson._speedups', ['simplejson/_speedups.c'])
+      ]
+    )
+  finally:
+    os.chdir(cwd)
+    shutil.rmtree(build_temp, ignore_errors=True)
+
+if __name__ == '__main__':
+  build()
@@ -0,0 +1,343 @@
+"""
+benchmark_buzz.py:
+
+Checks and benchmarks for buzz.py, run from the repository root:
+
+  python tools/benchmark_buzz.py [captured comments feed]
+
+It checks OAuthSigner against build_oauth_request and times OAuth
+signing, model decoding, field projection, streaming, the JSON backends
+and identity interning on synthetic feeds.
+
+* Author:       Mitchell Bowden <mitchellbowden AT gmail DOT com>
+* License:      MIT License: http://creativecommons.org/licenses/MIT/
+"""
+
+import os
+import sys
+import time
+import urllib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import buzz
+
+def _legacy_oauth_header(client, http_method, http_uri, timestamp, nonce):
+  """The Authorization header as built by build_oauth_request."""
+  oauth = buzz.oauth
+  real_timestamp, real_nonce = oauth.generate_timestamp, oauth.generate_nonce
+  oauth.generate_timestamp = lambda: timestamp
+  oauth.generate_nonce = lambda: nonce
+  try:
+    return client.build_oauth_request(http_method, http_uri).to_header()
+  finally:
+    oauth.generate_timestamp, oauth.generate_nonce = real_timestamp, real_nonce
+
+def _oauth_header_params(header):
+  return sorted(header['Authorization'][len('OAuth '):].split(', '))
+
+def check_oauth_signer(trials=2000, seed=0):
+  """Checks OAuthSigner headers against build_oauth_request on random URIs."""
+  import random
+  rnd = random.Random(seed)
+  client = buzz.Client()
+  client.build_oauth_consumer('buzz-referee.appspot.com', 'c0nsumer/s3cret+=')
+  client.build_oauth_access_token('1/aB-cD_eF~gH', 't0ken s3cret&%')
+  values = ['', 'a', 'b c', 'x+y', '%2F', u'caf\xe9'.encode('utf-8'), '~-._',
+            '@me', '1123', '&', '=']
+  for i in xrange(trials):
+    query = []
+    for j in xrange(rnd.randint(0, 5)):
+      k = rnd.choice(['alt', 'q', 'c', 'max-results', 'lat', 'lon', 'a b'])
+      v = urllib.quote(rnd.choice(values), safe=rnd.choice(['', '/', '&=+']))
+      query.append(rnd.choice(['%s=%s' % (k, v), k]))
+    http_uri = rnd.choice([
+      buzz.API_PREFIX + '/activities/@me/@consumption',
+      'https://www.googleapis.com:443/buzz/v1/activities/search',
+      'http://example.com:80/a;b/c'
+    ])
+    if query or rnd.random() < 0.5:
+      http_uri += '?' + rnd.choice(['&', ';']).join(query)
+    http_method = rnd.choice(['GET', 'POST', 'delete'])
+    timestamp = 1277942400 + i
+    nonce = '%08d' % rnd.randint(0, 99999999)
+    legacy = _legacy_oauth_header(client, http_method, http_uri, timestamp, nonce)
+    signed = client.oauth_signer.sign(http_method, http_uri, timestamp, nonce)
+    if _oauth_header_params(legacy) != _oauth_header_params(signed):
+      raise AssertionError('header mismatch on %s %s:\n%s\n%s' % (
+        http_method, http_uri, legacy, signed
+      ))
+  print 'OAuthSigner: %d randomized requests match' % trials
+
+def benchmark_oauth_signer(n=5000, repeat=5):
+  """Signing throughput of build_oauth_request against OAuthSigner."""
+  import timeit
+  client = buzz.Client()
+  client.build_oauth_consumer('buzz-referee.appspot.com', 'consumer_secret')
+  client.build_oauth_access_token('1/access_token_key', 'access_token_secret')
+  http_uri = buzz.API_PREFIX + \
+    '/activities/@me/@consumption?alt=json&max-results=100&c=abcdef'
+  signer = client.oauth_signer
+  for name, f in [
+      ('build_oauth_request',
+        lambda: client.build_oauth_request('GET', http_uri).to_header()),
+      ('OAuthSigner', lambda: signer.sign('GET', http_uri))]:
+    t = timeit.Timer(lambda: [f() for i in xrange(n)])
+    best = min(t.repeat(repeat=repeat, number=1))
+    print '%-20s %8.2f us/request %8d requests/s' % (
+      name, best * 1e6 / n, n / best
+    )
+
+def _synthetic_comments_feed(n, seed=0):
+  """A comments feed shaped like the API's, as a JSON string."""
+  import random
+  rnd = random.Random(seed)
+  words = ['the', 'referee', 'is', 'wrong', 'about', 'this', 'one', 'lol']
+  items = []
+  for i in xrange(n):
+    actor = '1%020d' % rnd.randint(0, 50)
+    items.append({
+      'kind': 'buzz#comment',
+      'id': 'tag:google.com,2010:buzz-comment:z12%020d' % i,
+      'content': ' '.join([rnd.choice(words) for j in xrange(rnd.randint(1, 60))]),
+      'published': '2010-07-01T00:%02d:%02d.000Z' % (i / 60 % 60, i % 60),
+      'actor': {
+        'id': actor,
+        'name': 'Person %s' % actor[-2:],
+        'profileUrl': 'http://www.google.com/profiles/%s' % actor,
+        'thumbnailUrl': '/photos/public/AIbEiAIAAABDCJ%s' % actor
+      },
+      'links': {
+        'inReplyTo': [{
+          'ref': 'tag:google.com,2010:buzz:z12abcdefghijklmnopqr',
+          'href': 'http://www.google.com/buzz/%s/abcdef' % actor,
+          'type': 'text/html'
+        }]
+      }
+    })
+  return buzz.simplejson.dumps({
+    'data': {'kind': 'buzz#commentFeed', 'items': items}
+  })
+
+def benchmark_models(path=None, repeat=5):
+  """
+  Decoding cost of a comments feed: reading only the fields the referee
+  uses, against decoding every field as the models used to on
+  construction.  Reads a captured feed from C{path} if given, otherwise a
+  synthetic one.
+  """
+  import timeit
+  if path:
+    body = open(path).read()
+  else:
+    body = _synthetic_comments_feed(2000)
+  items = buzz._prune_json_envelope(buzz.simplejson.loads(body))
+  def referee_fields():
+    for comment_json in items:
+      comment = buzz.Comment(comment_json)
+      comment.content, comment.actor.id, comment.actor.name
+  def all_fields():
+    for comment_json in items:
+      comment = buzz.Comment(comment_json)
+      comment.release_json()
+      comment.actor.release_json()
+  for name, f in [('all fields', all_fields), ('referee fields', referee_fields)]:
+    best = min(timeit.Timer(f).repeat(repeat=repeat, number=1))
+    print '%-16s %8.2f us/comment' % (name, best * 1e6 / len(items))
+
+def benchmark_identity(repeat=10):
+  """
+  Reading the identity of each comment's actor, with every actor parsed
+  from its json against the interned identities of buzz.identity_cache.
+  """
+  import timeit
+  actors = [
+    comment_json['actor'] for comment_json in buzz._prune_json_envelope(
+      buzz.simplejson.loads(_synthetic_comments_feed(2000))
+    )
+  ]
+  class Uncached:
+    def identity(self, json):
+      return buzz._parse_identity(json)
+  def read():
+    for actor_json in actors:
+      actor = buzz.Person(actor_json)
+      actor.id, actor.name, actor.profile_name, actor.photo
+  interned = buzz.identity_cache
+  interned.clear()
+  try:
+    for name, cache in [('parsed', Uncached()), ('interned', interned)]:
+      buzz.identity_cache = cache
+      best = min(timeit.Timer(read).repeat(repeat=repeat, number=1))
+      print '%-10s %8.2f us/actor' % (name, best * 1e6 / len(actors))
+  finally:
+    buzz.identity_cache = interned
+  print 'identity cache: %(hits)d hits, %(misses)d misses, ' \
+    '%(entries)d entries' % buzz.identity_cache.stats()
+
+def _synthetic_posts_feed(n, seed=0):
+  """A consumption feed shaped like the API's, as a JSON string."""
+  import random
+  rnd = random.Random(seed)
+  words = ['the', 'referee', 'is', 'wrong', 'about', 'this', 'one', 'lol']
+  items = []
+  for i in xrange(n):
+    actor = '1%020d' % rnd.randint(0, 500)
+    post_id = 'tag:google.com,2010:buzz:z12%020d' % i
+    href = 'https://www.googleapis.com/buzz/v1/activities/%s/@self/%s' % (
+      actor, post_id
+    )
+    content = ' '.join([rnd.choice(words) for j in xrange(rnd.randint(1, 80))])
+    items.append({
+      'kind': 'buzz#activity',
+      'id': post_id,
+      'title': content[:40],
+      'published': '2010-07-01T00:00:00.000Z',
+      'updated': '2010-07-01T%02d:%02d:00.000Z' % (i / 60 % 24, i % 60),
+      'actor': {
+        'id': actor,
+        'name': 'Person %s' % actor[-3:],
+        'profileUrl': 'http://www.google.com/profiles/%s' % actor,
+        'thumbnailUrl': '/photos/public/AIbEiAIAAABDCJ%s' % actor
+      },
+      'verb': ['post'],
+      'object': {
+        'type': 'note',
+        'content': content,
+        'originalContent': content,
+        'links': {'alternate': [{'href': href, 'type': 'text/html'}]},
+        'attachments': [{
+          'type': 'photo',
+          'title': 'photo %d' % j,
+          'links': {
+            'preview': [{'href': href + '/p%d' % j, 'type': 'image/jpeg'}],
+            'enclosure': [{'href': href + '/e%d' % j, 'type': 'image/jpeg'}]
+          }
+        } for j in xrange(rnd.randint(0, 3))]
+      },
+      'links': {
+        'alternate': [{'href': href, 'type': 'text/html'}],
+        'replies': [{
+          'href': href + '/@comments', 'type': 'application/atom+xml',
+          'count': rnd.randint(0, 40), 'updated': '2010-07-01T00:00:00.000Z'
+        }],
+        'liked': [{'href': href + '/@liked', 'count': rnd.randint(0, 9)}]
+      },
+      'source': {'title': 'Buzz'},
+      'visibility': {'entries': [{'id': 'tag:google.com,2010:buzz-group:1'}]}
+    })
+  return buzz.simplejson.dumps({'data': {
+    'kind': 'buzz#activityFeed', 'items': items,
+    'links': {'next': [{
+      'href': buzz.API_PREFIX + '/activities/@me/@consumption?c=x'
+    }]}
+  }})
+
+def benchmark_projection(n=5000, fields=None, repeat=3):
+  """
+  Decoding a consumption feed of n posts whole, against decoding only the
+  given fields, by default the ones queue_ref reads.
+  """
+  import timeit
+  if fields is None:
+    fields = (
+      'placeholder', 'actor.id', 'actor.name', 'updated', 'links.replies',
+      'content', 'object.content'
+    )
+  body = _synthetic_posts_feed(n)
+  decoder = buzz._projected_decoder(buzz.Post, fields)
+  def read(json):
+    for post_json in buzz._prune_json_envelope(json):
+      post = buzz.Post(post_json)
+      post.placeholder, post.actor.id, post.comment_count, post.updated
+      post.content
+  for name, decode in [
+      ('whole', buzz.simplejson.loads), ('projected', decoder.decode)]:
+    best = min(timeit.Timer(lambda: read(decode(body))).repeat(
+      repeat=repeat, number=1
+    ))
+    size = len(buzz.simplejson.dumps(decode(body)))
+    print '%-10s %8.2f us/post %8d bytes of json kept' % (
+      name, best * 1e6 / n, size
+    )
+
+def benchmark_streaming(n=5000, repeat=3):
+  """
+  Reading a consumption feed of n posts whole and then decoding it, against
+  decoding it as it is read, from an in-memory body.
+  """
+  import StringIO
+  body = _synthetic_posts_feed(n)
+  def buffered():
+    json = buzz.simplejson.loads(StringIO.StringIO(body).read())
+    for post_json in buzz._prune_json_envelope(json):
+      yield buzz.Post(post_json)
+  def streamed():
+    for post_json in buzz.StreamingDecoder(StringIO.StringIO(body).read):
+      yield buzz.Post(post_json)
+  for name, results, held in [
+      ('buffered', buffered, len(body)), ('streamed', streamed, None)]:
+    firsts, totals = [], []
+    for i in xrange(repeat):
+      started = time.time()
+      iterator = results()
+      iterator.next()
+      firsts.append(time.time() - started)
+      for post in iterator:
+        pass
+      totals.append(time.time() - started)
+    if held is None:
+      decoder = buzz.StreamingDecoder(StringIO.StringIO(body).read)
+      for post_json in decoder:
+        pass
+      held = decoder.peak_buffered
+    print '%-10s first result %8.1f ms, all %8.1f ms, %9d bytes of body held' % (
+      name, min(firsts) * 1e3, min(totals) * 1e3, held
+    )
+
+def benchmark_json_backends(n=2000, repeat=3):
+  """
+  Decoding throughput of each available JSON backend on a consumption feed
+  of n posts, the bundled simplejson also without its C speedups.
+  """
+  import timeit
+  body = buzz.simplejson.dumps(
+    buzz.simplejson.loads(_synthetic_posts_feed(n))
+  )
+  runs = []
+  for name, json in buzz._json_backends():
+    runs.append((name, json, buzz._json_accelerated(json)))
+    if name == 'simplejson' and buzz._json_accelerated(json):
+      runs.append((name, json, False))
+  for name, json, accelerated in runs:
+    toggle = not accelerated and buzz._json_accelerated(json)
+    if toggle:
+      json._toggle_speedups(False)
+    try:
+      best = min(timeit.Timer(lambda: json.loads(body)).repeat(
+        repeat=repeat, number=1
+      ))
+    finally:
+      if toggle:
+        json._toggle_speedups(True)
+    selected = name == buzz.JSON_BACKEND and \
+      accelerated == buzz.JSON_ACCELERATED
+    print '%-24s %-12s %8.1f MB/s%s' % (
+      name, accelerated and 'C speedups' or 'pure Python',
+      len(body) / best / 1e6, selected and '  (selected)' or ''
+    )
+
+def main():
+  check_oauth_signer()
+  benchmark_oauth_signer()
+  if len(sys.argv) > 1:
+    benchmark_models(sys.argv[1])
+  else:
+    benchmark_models()
+  benchmark_projection()
+  benchmark_streaming()
+  benchmark_json_backends()
+  benchmark_identity()
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,72 @@
+"""
+benchmark_comment_normalizer.py:
+
+Checks lib.comment_normalizer.comment_stats() against the
+normalize-then-count code it replaced, and times both, on a synthetic
+corpus of comments. Run from the repository root:
+
+  python tools/benchmark_comment_normalizer.py
+
+* Author:       Mitchell Bowden <mitchellbowden AT gmail DOT com>
+* License:      MIT License: http://creativecommons.org/licenses/MIT/
+"""
+
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import utils.consts
+import lib.comment_normalizer
+
+# the normalize-then-count code comment_stats replaces
+def _legacy_comment_stats(content):
+  content = content.lower().strip().replace(u'\u2019', '\'')
+  content = re.sub('<br />|\\r|\\n', ' ', content)
+  calls = content.find('href="http://www.google.com/profiles/' + \
+      utils.consts.BUZZREFEREE_ID) != -1 or \
+    content.find('href="http://www.google.com/profiles/' + \
+      utils.consts.BUZZREFEREE_ID_STR) != -1
+  return (len(content), len(content.split()), content.count('a href'), calls)
+
+def _synthetic_corpus(n, seed=0):
+  import random
+  rnd = random.Random(seed)
+  words = [
+    u'the', u'Referee', u'is', u'wrong', u'about', u'THIS', u'one', u'a',
+    u'it\u2019s', u'<b>clearly</b>', u'<i>obvious</i>', u'lol',
+    u'&quot;no&quot;'
+  ]
+  seps = [u' ', u' ', u' ', u' ', u'<br />', u'<BR />', u'\n', u'\r\n', u'\t']
+  corpus = []
+  for i in xrange(n):
+    parts = [rnd.choice([u'', u' ', u'\n'])]
+    for j in xrange(rnd.randint(0, 120)):
+      parts.append(rnd.choice(words))
+      parts.append(rnd.choice(seps))
+      if rnd.random() < 0.03:
+        parts.append(u'<a href="http://example.com/%d">link</a> ' % j)
+    if rnd.random() < 0.05:
+      parts.append(u'@<a href="http://www.google.com/profiles/%s">' \
+          u'buzzreferee</a>' % utils.consts.BUZZREFEREE_ID_STR)
+    parts.append(rnd.choice([u'', u' ', u'<br />', u'\r\n']))
+    corpus.append(u''.join(parts))
+  return corpus
+
+def benchmark(n=5000, repeat=5):
+  import timeit
+  corpus = _synthetic_corpus(n)
+  for content in corpus:
+    if lib.comment_normalizer.comment_stats(content) != \
+        _legacy_comment_stats(content):
+      raise AssertionError('mismatch on %r' % content)
+  for name, f in [
+      ('legacy', _legacy_comment_stats),
+      ('comment_stats', lib.comment_normalizer.comment_stats)]:
+    t = timeit.Timer(lambda: [f(c) for c in corpus])
+    best = min(t.repeat(repeat=repeat, number=1))
+    print '%-14s %8.2f us/comment' % (name, best * 1e6 / n)
+
+if __name__ == '__main__':
+  benchmark()
@@ -0,0 +1,46 @@
+"""
+check_post_attributes.py:
+
+Randomized check that lib.post_attributes.Extremum, the running extrema
+of the per-actor totals, groups ties exactly like sorting the inverted
+totals did. Run from the repository root:
+
+  python tools/check_post_attributes.py
+
+* Author:       Mitchell Bowden <mitchellbowden AT gmail DOT com>
+* License:      MIT License: http://creativecommons.org/licenses/MIT/
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import lib.post_attributes
+
+# randomized check that the running extrema group ties exactly like
+# sorting the inverted totals did
+def _sorted_grouped(d):
+  out = {}
+  for k in d:
+    out.setdefault(d[k], []).append(k)
+  return sorted(out.items())
+
+def check_extremum(trials=2000, seed=0):
+  import random
+  rnd = random.Random(seed)
+  for i in xrange(trials):
+    extremum = lib.post_attributes.Extremum()
+    actors = ['%d' % a for a in xrange(rnd.randint(1, 12))]
+    for j in xrange(rnd.randint(1, 60)):
+      extremum.add(
+        rnd.choice(actors), rnd.choice([0, 1, 1, 2, 3, rnd.randint(0, 50)])
+      )
+      grouped = _sorted_grouped(extremum.totals)
+      if sorted(extremum.max_ids) != sorted(grouped[-1][1]) or \
+          sorted(extremum.min_ids) != sorted(grouped[0][1]):
+        raise AssertionError('extremum mismatch on %s' % extremum.totals)
+  print 'Extremum: %d randomized trials match' % trials
+
+if __name__ == '__main__':
+  check_extremum()